@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the parts of Instagram, its media CDN and HIBP that ig_osint talks to.
+- FakeInstagram is a requests transport adapter; install it with ig_osint.Transport(...)
+  and every request is answered in-process, nothing leaves the machine.
+- SyntheticProfile describes a made-up account: post count, video / carousel mix and media sizes.
+- Answers the anonymous Instaloader path: profile page, web_profile_info, timeline pages and
+  single posts by shortcode (doc_id GraphQL POST), CDN files, and the HIBP breachedaccount endpoint.
+"""
+
+import io
+import json
+import time
+import zlib
+import struct
+import hashlib
+import threading
+import http.client
+from email.utils import formatdate
+from urllib.parse import urlparse, parse_qs
+
+import urllib3
+from requests.adapters import HTTPAdapter
+
+CDN_HOST = "scontent.cdninstagram.com"
+PAGE_SIZE = 12
+# Posts are spaced an hour apart going back from here, newest first
+NEWEST_POST = 1735689600
+LAST_MODIFIED = formatdate(NEWEST_POST, usegmt=True)
+
+class SyntheticProfile:
+    """
+    A made-up account. Every `video_every`-th post is a video and every `sidecar_every`-th
+    post a carousel of `sidecar_size` images; the rest are single images. With repost_every,
+    that many posts apart the picture of the post before is reposted, cropped and re-encoded.
+    Posts whose index is in `deleted` are gone from the feed. Media URLs carry the current
+    url_epoch; the CDN refuses older ones with a 403, so bumping it expires every URL handed out.
+    """
+    def __init__(self, username, posts=24, followers=1000, following=100, private=False,
+                 image_px=640, video_kb=256, video_every=5, sidecar_every=7, sidecar_size=3,
+                 breaches=None, repost_every=0, deleted=()):
+        self.username = username.lower()
+        self.user_id = str(int(hashlib.sha256(self.username.encode()).hexdigest()[:12], 16))
+        self.posts = posts
+        self.followers = followers
+        self.following = following
+        self.private = private
+        self.image_px = image_px
+        self.video_kb = video_kb
+        self.video_every = video_every
+        self.sidecar_every = sidecar_every
+        self.sidecar_size = sidecar_size
+        self.repost_every = repost_every
+        self.deleted = set(deleted)
+        self.url_epoch = 0
+        # None: not in any breach (HIBP answers 404); otherwise a list of breach names
+        self.breaches = breaches
+
+    def media_url(self, name):
+        return f"https://{CDN_HOST}/v/{self.username}/{name}?_nc_ht=fake&oe={self.url_epoch}"
+
+    def live_posts(self):
+        """Indices of the posts still on the profile, newest first."""
+        return [i for i in range(self.posts) if i not in self.deleted]
+
+    def user_node(self):
+        return {
+            "id": self.user_id,
+            "pk": self.user_id,
+            "username": self.username,
+            "full_name": self.username.title(),
+            "biography": f"Synthetic profile with {len(self.live_posts())} posts",
+            "is_private": self.private,
+            "is_verified": False,
+            "profile_pic_url": self.media_url("profile.jpg"),
+            "profile_pic_url_hd": self.media_url("profile.jpg"),
+            "edge_followed_by": {"count": self.followers},
+            "edge_follow": {"count": self.following},
+            "edge_felix_video_timeline": {"count": 0},
+        }
+
+    def page_user(self):
+        """The profile as the public profile page embeds it."""
+        node = self.user_node()
+        for key in ("id", "edge_followed_by", "edge_follow", "edge_felix_video_timeline"):
+            node.pop(key)
+        node.update(media_count=len(self.live_posts()), follower_count=self.followers, following_count=self.following)
+        return node
+
+    def post_node(self, index):
+        shortcode = f"{self.username[:4]}{index:07d}"
+        node = {
+            "id": str(int(self.user_id) * 100000 + index),
+            "shortcode": shortcode,
+            "__typename": "GraphImage",
+            "is_video": False,
+            "taken_at_timestamp": NEWEST_POST - index * 3600,
+            "display_url": self.media_url(f"{shortcode}.jpg"),
+            "edge_media_to_caption": {"edges": [{"node": {"text": f"Post {index} #synthetic"}}]},
+            "edge_media_to_comment": {"count": index % 9},
+            "edge_liked_by": {"count": index * 3},
+            "owner": {"id": self.user_id, "username": self.username},
+        }
+        if self.video_every and index % self.video_every == self.video_every - 1:
+            node.update({"__typename": "GraphVideo", "is_video": True,
+                         "video_url": self.media_url(f"{shortcode}.mp4"), "video_view_count": index * 10})
+        elif self.sidecar_every and index % self.sidecar_every == self.sidecar_every - 1:
+            node["__typename"] = "GraphSidecar"
+            node["edge_sidecar_to_children"] = {"edges": [
+                {"node": {"display_url": self.media_url(f"{shortcode}_{i}.jpg"), "is_video": False}}
+                for i in range(1, self.sidecar_size + 1)]}
+        return node
+
+    def web_info_item(self, shortcode):
+        """A post the way the shortcode query returns it (a Polaris media item), or None if there is none."""
+        index = int(shortcode[-7:]) if shortcode[-7:].isdigit() else -1
+        if not shortcode.startswith(self.username[:4]) or index not in self.live_posts():
+            return None
+        node = self.post_node(index)
+        item = {
+            "code": node["shortcode"],
+            "pk": node["id"],
+            "media_type": {"GraphImage": 1, "GraphVideo": 2, "GraphSidecar": 8}[node["__typename"]],
+            "taken_at": node["taken_at_timestamp"],
+            "user": {"pk": self.user_id, "username": self.username},
+            "image_versions2": {"candidates": [{"url": node["display_url"]}]},
+            "caption": {"text": node["edge_media_to_caption"]["edges"][0]["node"]["text"]},
+            "like_count": node["edge_liked_by"]["count"],
+            "comment_count": node["edge_media_to_comment"]["count"],
+        }
+        if node["is_video"]:
+            item.update(video_versions=[{"url": node["video_url"]}], view_count=node["video_view_count"])
+        if node["__typename"] == "GraphSidecar":
+            item["carousel_media"] = [{"media_type": 1, "image_versions2": {"candidates": [
+                {"url": edge["node"]["display_url"]}]}} for edge in node["edge_sidecar_to_children"]["edges"]]
+        return item
+
+    def timeline(self, after=None):
+        """One page of edge_owner_to_timeline_media; cursors are plain offsets into the live posts."""
+        live = self.live_posts()
+        start = int(after) if after else 0
+        end = min(len(live), start + PAGE_SIZE)
+        return {
+            "count": len(live),
+            "page_info": {"has_next_page": end < len(live), "end_cursor": str(end) if end < len(live) else None},
+            "edges": [{"node": self.post_node(i)} for i in live[start:end]],
+        }
+
+    def media(self, name):
+        """Bytes served for a CDN file name: a real JPEG for pictures, an MP4-shaped blob for videos."""
+        if name.endswith(".mp4"):
+            return fake_mp4(name, self.video_kb * 1024)
+        stem = name[:-len(".jpg")]
+        index = int(stem[-7:]) if name.endswith(".jpg") and stem[-7:].isdigit() else 0
+        if self.repost_every and index and index % self.repost_every == 0:
+            return fake_repost(f"{stem[:-7]}{index - 1:07d}.jpg", self.image_px)
+        return fake_jpeg(name, self.image_px)
+
+
+_MEDIA_CACHE = {}
+_MEDIA_LOCK = threading.Lock()
+
+def fake_jpeg(name, px):
+    """
+    A px x px JPEG whose colours depend on name, so every post has different content.
+    Encoded once per (name, px) and kept in memory.
+    """
+    key = ("jpg", name, px)
+    with _MEDIA_LOCK:
+        if key in _MEDIA_CACHE:
+            return _MEDIA_CACHE[key]
+    from PIL import Image
+    seed = hashlib.sha256(name.encode()).digest()
+    small = Image.frombytes("RGB", (8, 8), (seed * 6)[:192])
+    buf = io.BytesIO()
+    small.resize((px, px), Image.BILINEAR).save(buf, "JPEG", quality=85)
+    data = buf.getvalue()
+    with _MEDIA_LOCK:
+        _MEDIA_CACHE[key] = data
+    return data
+
+def fake_repost(name, px):
+    """The JPEG for name with 5% cropped off every edge, scaled back to px and saved at lower quality."""
+    key = ("repost", name, px)
+    with _MEDIA_LOCK:
+        if key in _MEDIA_CACHE:
+            return _MEDIA_CACHE[key]
+    from PIL import Image
+    margin = px // 20
+    with Image.open(io.BytesIO(fake_jpeg(name, px))) as img:
+        cropped = img.crop((margin, margin, px - margin, px - margin)).resize((px, px), Image.BILINEAR)
+    buf = io.BytesIO()
+    cropped.save(buf, "JPEG", quality=60)
+    data = buf.getvalue()
+    with _MEDIA_LOCK:
+        _MEDIA_CACHE[key] = data
+    return data
+
+def _box(kind, payload):
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+def _track(handler, codec, width=0, height=0):
+    tkhd = _box(b"tkhd", struct.pack(">B3x5I8x4H36xII", 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, width << 16, height << 16))
+    hdlr = _box(b"hdlr", struct.pack(">4x4x4s12x", handler) + b"\x00")
+    stsd = _box(b"stsd", struct.pack(">4xI", 1) + _box(codec, b"\x00" * 8))
+    return _box(b"trak", tkhd + _box(b"mdia", hdlr + _box(b"minf", _box(b"stbl", stsd))))
+
+def fake_mp4(name, size):
+    """
+    ftyp, moov (mvhd plus an avc1 video and an mp4a audio track) and mdat padding up to size
+    bytes. Every other file keeps its moov after the mdat, as non-"faststart" encoders do.
+    """
+    key = ("mp4", name, size)
+    with _MEDIA_LOCK:
+        if key in _MEDIA_CACHE:
+            return _MEDIA_CACHE[key]
+    seed = zlib.crc32(name.encode())
+    ftyp = _box(b"ftyp", b"isom" + struct.pack(">I", 512) + b"isomiso2avc1mp41")
+    # mvhd v0: creation time (1904 epoch), timescale 1000, duration derived from the name
+    created = NEWEST_POST - seed % 86400 + 2082844800
+    mvhd = _box(b"mvhd", struct.pack(">B3xIIII", 0, created, created, 1000, 1000 * (5 + seed % 55)) + b"\x00" * 80)
+    moov = _box(b"moov", mvhd + _track(b"vide", b"avc1", 1080, 1920) + _track(b"soun", b"mp4a"))
+    filler = max(0, size - len(ftyp) - len(moov) - 8)
+    mdat = struct.pack(">I4s", 8 + filler, b"mdat") + hashlib.sha256(name.encode()).digest() * (filler // 32) \
+        + b"\x00" * (filler % 32)
+    data = ftyp + (moov + mdat if seed % 2 else mdat + moov)
+    with _MEDIA_LOCK:
+        _MEDIA_CACHE[key] = data
+    return data
+
+
+class _OriginalResponse:
+    """Just enough of http.client.HTTPResponse for requests to read Set-Cookie headers."""
+    def __init__(self, headers):
+        self.msg = http.client.HTTPMessage()
+        for name, value in headers:
+            self.msg[name] = value
+
+    def isclosed(self):
+        return True
+
+    def close(self):
+        pass
+
+class FakeInstagram(HTTPAdapter):
+    """
+    Transport adapter answering Instagram, CDN and HIBP requests from SyntheticProfiles.
+    latency adds a fixed delay per request to mimic a network round trip; hibp_latency is
+    added on top for breach lookups, and the first hibp_429 lookups are refused with a
+    Retry-After of one second. Likewise the first cdn_429 media requests are refused, with
+    no Retry-After. Counts requests per route in .requests.
+    """
+    def __init__(self, profiles, latency=0.0, hibp_latency=0.0, hibp_429=0, cdn_429=0):
+        super().__init__()
+        self.profiles = {p.username: p for p in profiles}
+        self.latency = latency
+        self.hibp_latency = hibp_latency
+        self.hibp_429 = hibp_429
+        self.cdn_429 = cdn_429
+        self.requests = {}
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests = {}
+            self.bytes_sent = 0
+
+    def total_requests(self):
+        return sum(self.requests.values())
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        url = urlparse(request.url)
+        route, status, headers, body = self.route(request.method, url.netloc, url.path,
+                                                  parse_qs(url.query), request.body)
+        with self._lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+            self.bytes_sent += len(body)
+        delay = self.latency + (self.hibp_latency if route == "hibp" else 0)
+        if delay:
+            time.sleep(delay)
+        headers = [("Content-Length", str(len(body)))] + headers
+        raw = urllib3.HTTPResponse(body=io.BytesIO(body), headers=headers, status=status,
+                                   reason=http.client.responses.get(status, ""), preload_content=False,
+                                   decode_content=False, original_response=_OriginalResponse(headers),
+                                   request_url=request.url)
+        return self.build_response(request, raw)
+
+    def route(self, method, host, path, query, body):
+        """Returns (route name, status, headers, body bytes)."""
+        if host == CDN_HOST:
+            with self._lock:
+                refuse, self.cdn_429 = self.cdn_429 > 0, max(0, self.cdn_429 - 1)
+            if refuse:
+                return "cdn", 429, [], b""
+            parts = path.strip("/").split("/")
+            profile = self.profiles.get(parts[1]) if len(parts) == 3 else None
+            if profile is None:
+                return "cdn", 404, [], b""
+            if query.get("oe", [""])[0] != str(profile.url_epoch):
+                return "cdn", 403, [], b"URL signature expired"
+            ctype = "video/mp4" if parts[2].endswith(".mp4") else "image/jpeg"
+            return "cdn", 200, [("Content-Type", ctype), ("Last-Modified", LAST_MODIFIED)], profile.media(parts[2])
+        if host == "haveibeenpwned.com":
+            with self._lock:
+                refuse, self.hibp_429 = self.hibp_429 > 0, max(0, self.hibp_429 - 1)
+            if refuse:
+                return "hibp", 429, [("Retry-After", "1")], b""
+            account = path.rstrip("/").rsplit("/", 1)[-1].lower()
+            profile = self.profiles.get(account)
+            if profile is None or not profile.breaches:
+                return "hibp", 404, [], b""
+            return "hibp", 200, *self._json([{"Name": name} for name in profile.breaches])
+        if host != "www.instagram.com":
+            return "other", 404, [], b""
+        if path == "/":
+            return "home", 200, [("Content-Type", "text/html"),
+                                 ("Set-Cookie", "csrftoken=fakecsrf; Path=/; Domain=.instagram.com")], b"<html></html>"
+        if path == "/api/v1/users/web_profile_info/":
+            profile = self.profiles.get(query.get("username", [""])[0].lower())
+            if profile is None:
+                return "web_profile_info", 404, *self._json({"status": "fail"})
+            user = dict(profile.user_node(), edge_owner_to_timeline_media=profile.timeline())
+            return "web_profile_info", 200, *self._json({"data": {"user": user}, "status": "ok"})
+        if path == "/graphql/query" and method == "POST":
+            form = parse_qs(body.decode() if isinstance(body, bytes) else body or "")
+            variables = json.loads(form.get("variables", ["{}"])[0])
+            if "shortcode" in variables:
+                items = [item for item in (p.web_info_item(variables["shortcode"]) for p in self.profiles.values())
+                         if item]
+                return "graphql", 200, *self._json({"data": {"xdt_api__v1__media__shortcode__web_info": {
+                    "items": items}}, "status": "ok"})
+            profile = next((p for p in self.profiles.values() if p.user_id == str(variables.get("id"))), None)
+            if profile is None:
+                return "graphql", 200, *self._json({"data": {"user": None}, "status": "ok"})
+            media = profile.timeline(variables.get("after"))
+            return "graphql", 200, *self._json({"data": {"user": {"edge_owner_to_timeline_media": media}},
+                                                "status": "ok"})
+        profile = self.profiles.get(path.strip("/").lower())
+        if profile is None:
+            return "profile_page", 404, [("Content-Type", "text/html")], b"<html>Not found</html>"
+        embedded = {"require": [["ScheduledServerJS", "handle", None, [{"__bbox": {"result": {
+            "data": {"xig_user_by_username": profile.page_user()}}}}]]]}
+        page = (f'<html><body><script type="application/json" data-sjs>{json.dumps(embedded)}</script>'
+                f'</body></html>').encode()
+        return "profile_page", 200, [("Content-Type", "text/html")], page
+
+    @staticmethod
+    def _json(obj):
+        return [("Content-Type", "application/json")], json.dumps(obj).encode()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for ig_osint.py
+- Every request goes to benchmarks/fake_instagram.py through ig_osint.Transport; nothing
+  touches the network, so runs are repeatable and need no account.
+- Times fetch_profile, download_media, generate_pdf_report, zip_folder and the headless
+  end-to-end flow, each cold (fresh output folder) and warm (repeat run over existing output),
+  plus the same flow replayed from a recorded cassette.
+- --save-baseline writes the results to benchmarks/baseline.json; later runs compare against it
+  and exit 1 when a case got slower than the tolerance or started making more requests.
+
+Usage: python benchmarks/run.py [--posts 60] [--repeat 5] [--latency-ms 0] [--save-baseline]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import contextlib
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import ig_osint
+from fake_instagram import FakeInstagram, SyntheticProfile
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+USERNAME = "bench_target"
+
+def quiet_loader():
+    """
+    The shared Instaloader with its politeness delays switched off: against the stand-in they
+    would only measure time.sleep.
+    """
+    L = ig_osint.create_instaloader_session()
+    L.context.sleep = False
+    L.context._rate_controller.sleep = lambda secs: None
+    return L
+
+def remove(*paths):
+    for path in paths:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+def run_flow(*commands):
+    with contextlib.redirect_stdout(io.StringIO()):
+        for argv in commands:
+            if ig_osint.main(argv) != 0:
+                raise RuntimeError(f"headless command failed: {' '.join(argv)}")
+
+def check(result):
+    """Flow functions report failure as (False, error) rather than raising."""
+    if not result[0]:
+        raise RuntimeError(result[1])
+    return result
+
+def build_cases(user):
+    """
+    (name, setup, run) triples. setup() puts the workspace into the state the case starts from
+    and is not timed.
+    """
+    downloads = os.path.join(ig_osint.DOWNLOADS_DIR, user)
+    zip_base = os.path.join(ig_osint.DOWNLOADS_DIR, f"{user}_media")
+    flow = [["analyze", user], ["download", user], ["report", user, "--hibp-key", "bench"], ["zip", user]]
+    tape = os.path.abspath(f"{user}.cassette")
+
+    def profile_data():
+        return ig_osint.cache_load(user)["data"]
+
+    def fresh_fetch():
+        remove(ig_osint.CACHE_DB, ig_osint.spool_path(user))
+
+    def have_profile():
+        if not ig_osint.cache_load(user):
+            check(ig_osint.fetch_profile_cached(quiet_loader(), user, force_refresh=True))
+
+    def fresh_download():
+        have_profile()
+        remove(downloads, ig_osint.CAS_DIR)
+
+    def have_download():
+        have_profile()
+        if not os.path.isdir(downloads):
+            check(ig_osint.download_media(None, user))
+
+    def fresh_reports():
+        have_profile()
+        remove(ig_osint.REPORTS_DIR)
+
+    def fresh_gallery():
+        have_download()
+        remove(ig_osint.REPORTS_DIR, ig_osint.THUMB_DIR)
+
+    def fresh_reports_and_breaches():
+        fresh_reports()
+        conn = ig_osint.cache_connect()
+        with conn:
+            conn.execute("DELETE FROM breaches")
+        conn.close()
+
+    def report_with_breach():
+        data = dict(profile_data(), BreachStatus=ig_osint.start_breach_check(user, "bench"))
+        check(ig_osint.generate_pdf_report(data, user))
+
+    def fresh_zip():
+        have_download()
+        remove(zip_base + ".zip")
+
+    def fresh_dhashes():
+        have_download()
+        remove(ig_osint.DHASH_INDEX)
+
+    def have_cassette():
+        if not os.path.exists(tape):
+            remove(ig_osint.OUTPUT_DIR)
+            cassette = ig_osint.Cassette(tape)
+            with ig_osint.Transport(cassette):
+                run_flow(*flow)
+            cassette.close()
+        remove(ig_osint.OUTPUT_DIR)
+
+    def replay_flow():
+        cassette = ig_osint.Cassette(tape, replay=True)
+        try:
+            with ig_osint.Transport(cassette):
+                run_flow(*flow)
+        finally:
+            cassette.close()
+
+    return [
+        ("fetch_profile.cold", fresh_fetch,
+         lambda: check(ig_osint.fetch_profile(quiet_loader(), user)[:2])),
+        ("fetch_profile.cached", have_profile,
+         lambda: check(ig_osint.fetch_profile_cached(quiet_loader(), user)[:2])),
+        ("download_media.cold", fresh_download, lambda: check(ig_osint.download_media(None, user))),
+        ("download_media.warm", have_download, lambda: check(ig_osint.download_media(None, user))),
+        ("generate_pdf_report.cold", fresh_reports,
+         lambda: check(ig_osint.generate_pdf_report(profile_data(), user))),
+        ("generate_pdf_report.warm", have_profile,
+         lambda: check(ig_osint.generate_pdf_report(profile_data(), user))),
+        ("generate_pdf_report.gallery.cold", fresh_gallery,
+         lambda: check(ig_osint.generate_pdf_report(profile_data(), user, gallery=True))),
+        ("report_with_breach.cold", fresh_reports_and_breaches, report_with_breach),
+        ("report_with_breach.warm", have_profile, report_with_breach),
+        ("zip_folder.cold", fresh_zip, lambda: check(ig_osint.zip_folder(downloads, zip_base))),
+        ("zip_folder.warm", have_download, lambda: check(ig_osint.zip_folder(downloads, zip_base))),
+        ("near_duplicates.cold", fresh_dhashes, lambda: ig_osint.collapsed_duplicates(downloads)),
+        ("near_duplicates.warm", have_download, lambda: ig_osint.collapsed_duplicates(downloads)),
+        ("flow.end_to_end.cold", lambda: remove(ig_osint.OUTPUT_DIR), lambda: run_flow(*flow)),
+        ("flow.end_to_end.warm", lambda: None, lambda: run_flow(*flow)),
+        ("flow.replay.cold", have_cassette, replay_flow),
+    ]
+
+def run_cases(fake, cases, repeat, only=None):
+    results = {}
+    for name, setup, run in cases:
+        if only and not any(pattern in name for pattern in only):
+            continue
+        times, requests = [], []
+        for _ in range(repeat):
+            setup()
+            fake.reset_counters()
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+            requests.append(fake.total_requests())
+        results[name] = {
+            "median_ms": round(statistics.median(times) * 1000, 2),
+            "min_ms": round(min(times) * 1000, 2),
+            "requests": max(requests),
+        }
+        print(f"  {name:<34} {results[name]['median_ms']:>10.1f} ms  (min {results[name]['min_ms']:.1f})"
+              f"  {results[name]['requests']:>5} requests", flush=True)
+    return results
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """
+    Regressions against a saved baseline: slower than baseline * (1 + tolerance) by more than
+    min_delta_ms, or more requests than before.
+    """
+    regressions = []
+    for name, now in results.items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        delta = now["median_ms"] - before["median_ms"]
+        if now["median_ms"] > before["median_ms"] * (1 + tolerance) and delta > min_delta_ms:
+            regressions.append(f"{name}: {before['median_ms']:.1f} ms -> {now['median_ms']:.1f} ms "
+                               f"(+{100 * delta / before['median_ms']:.0f}%)")
+        if now["requests"] > before["requests"]:
+            regressions.append(f"{name}: {before['requests']} -> {now['requests']} requests")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks for ig_osint against a local Instagram stand-in.")
+    parser.add_argument("--posts", type=int, default=60, help="posts on the synthetic profile (default %(default)s)")
+    parser.add_argument("--image-px", type=int, default=640, help="side of the synthetic JPEGs (default %(default)s)")
+    parser.add_argument("--video-kb", type=int, default=256, help="size of the synthetic videos (default %(default)s)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated round trip per request")
+    parser.add_argument("--hibp-latency-ms", type=float, default=250.0,
+                        help="extra delay of the breach API (default %(default)s ms)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case; the median is reported")
+    parser.add_argument("--only", action="append", help="run only cases whose name contains this (repeatable)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline file (default %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown ratio (default %(default)s)")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0,
+                        help="ignore slowdowns smaller than this (default %(default)s ms)")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--trace", help="record a Chrome trace of the whole run to this file (plus a .summary.json)")
+    args = parser.parse_args(argv)
+
+    ig_osint.ANIMATIONS["enabled"] = False
+    if args.trace:
+        args.trace = os.path.abspath(args.trace)
+        ig_osint.enable_tracing()
+    profile = SyntheticProfile(USERNAME, posts=args.posts, image_px=args.image_px, video_kb=args.video_kb,
+                               breaches=["Adobe", "LinkedIn"], repost_every=6)
+    fake = FakeInstagram([profile], latency=args.latency_ms / 1000, hibp_latency=args.hibp_latency_ms / 1000)
+    meta = {"posts": args.posts, "image_px": args.image_px, "video_kb": args.video_kb,
+            "latency_ms": args.latency_ms, "hibp_latency_ms": args.hibp_latency_ms, "repeat": args.repeat, "python": platform.python_version(),
+            "machine": platform.machine(), "cpus": os.cpu_count()}
+    print(f"ig_osint offline benchmarks: {args.posts} posts, {args.repeat} runs per case")
+
+    # The flow cases pick up the shared Instaloader too
+    quiet_loader()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir, ig_osint.Transport(fake):
+        # ig_osint writes relative to the working directory
+        os.chdir(workdir)
+        try:
+            results = run_cases(fake, build_cases(USERNAME), args.repeat, args.only)
+        finally:
+            os.chdir(cwd)
+    report = {"meta": meta, "results": results}
+    if args.trace:
+        print(f"Trace written: {args.trace} (summary: {ig_osint.export_trace(args.trace)})")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved: {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("No baseline yet (run with --save-baseline to record one).")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    changed = [k for k in ("posts", "image_px", "video_kb", "latency_ms", "hibp_latency_ms") if baseline.get("meta", {}).get(k) != meta[k]]
+    if changed:
+        print(f"Baseline was recorded with different settings ({', '.join(changed)}); not comparing.")
+        return 0
+    regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    print("OK" if not regressions else f"{len(regressions)} regression(s) against {args.baseline}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
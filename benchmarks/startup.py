@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for ig_osint.py
+- Times `import ig_osint` in fresh interpreters (median of several runs).
+- Fails (exit 1) when the import costs more than the budget, when a heavy dependency
+  is imported at module level, or when importing creates the output folders.
+
+Usage: python benchmarks/startup.py [--runs 15] [--budget-ms 40]
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules that must only be imported by the flows that need them
+HEAVY_MODULES = ["instaloader", "fpdf", "requests", "tabulate", "colorama", "PIL", "numpy"]
+DEFAULT_BUDGET_MS = float(os.environ.get("IG_OSINT_STARTUP_BUDGET_MS", 40))
+
+PROBE = """
+import sys, time, json
+sys.path.insert(0, {repo!r})
+t0 = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - t0
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def run_probe(body, cwd):
+    code = PROBE.format(repo=REPO_DIR, body=body, heavy=HEAVY_MODULES)
+    out = subprocess.run([sys.executable, "-c", code], cwd=cwd, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def top_imports(cwd, limit=10):
+    """
+    The slowest imports under ig_osint according to -X importtime, for the failure message.
+    """
+    code = f"import sys; sys.path.insert(0, {REPO_DIR!r}); import ig_osint"
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=cwd,
+                         capture_output=True, text=True)
+    lines = out.stderr.splitlines()
+    # -X importtime lists children before parents; everything after "site" was pulled in by ig_osint
+    site = max((i for i, line in enumerate(lines) if line.rstrip().endswith("| site")), default=-1)
+    rows = []
+    for line in lines[site + 1:]:
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_part, _, module = line.split("|")
+        try:
+            rows.append((int(self_part.split()[-1]), module.rstrip()))
+        except ValueError:
+            continue
+    rows.sort(reverse=True)
+    return rows[:limit]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure ig_osint import time against a budget.")
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="allowed median import time (default %(default)s ms)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as cwd:
+        run_probe("import ig_osint", cwd)  # warm the bytecode cache
+        results = [run_probe("import ig_osint", cwd) for _ in range(args.runs)]
+        created = sorted(os.listdir(cwd))
+        import_ms = statistics.median(r["elapsed"] for r in results) * 1000
+        loaded = sorted({m for r in results for m in r["loaded"]})
+
+        print(f"import ig_osint: {import_ms:.1f} ms median over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+        failures = []
+        if import_ms > args.budget_ms:
+            failures.append(f"import time {import_ms:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        if loaded:
+            failures.append("heavy modules imported at startup: " + ", ".join(loaded))
+        if created:
+            failures.append("importing created files in the working directory: " + ", ".join(created))
+        if failures:
+            for failure in failures:
+                print(f"FAIL: {failure}")
+            print("Slowest imports (self time, us | module):")
+            for self_us, module in top_imports(cwd):
+                print(f"  {self_us:>8} | {module}")
+            return 1
+    print("OK")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
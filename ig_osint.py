@@ -2,6 +2,7 @@
 """
 IG OSINT CLI Menu Tool
 - Interactive menu for profile analysis, media download, PDF report, zip export.
+- Headless subcommands (analyze, download, report, zip) print JSON and exit with a status code.
 - Optional: provide INSTALOADER_LOGIN and HIBP_API_KEY when needed.
 """
 
@@ -10,99 +11,352 @@ import time, sys
 import re
 import sys
 import time
+import io
 import json
+import threading
+import zlib
+import hashlib
+import zipfile
+import mmap
 import shutil
+import struct
+from collections import defaultdict, deque
 import getpass
-import requests
-from tabulate import tabulate
-from colorama import Fore, Back, Style, init
-from fpdf import FPDF
-import instaloader
-init(autoreset=True)
+from urllib.parse import urlparse
+import importlib
+import functools
+
+# ---------- Lazy imports ----------
+class LazyImport:
+    """
+    Stand-in for a module (or one of its attributes) that is only imported on first
+    attribute access, so starting the tool - or importing it - never pays for instaloader,
+    fpdf, requests, tabulate or colorama until a flow actually uses them.
+    """
+    def __init__(self, module, attr=None, on_load=None):
+        self._module = module
+        self._attr = attr
+        self._on_load = on_load
+        self._target = None
+
+    def _load(self):
+        if self._target is None:
+            module = importlib.import_module(self._module)
+            if self._on_load:
+                self._on_load(module)
+            self._target = getattr(module, self._attr) if self._attr else module
+        return self._target
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+_COLORAMA_READY = []
+
+def _init_colorama(colorama):
+    if not _COLORAMA_READY:
+        colorama.init(autoreset=True)
+        _COLORAMA_READY.append(True)
+
+requests = LazyImport("requests")
+instaloader = LazyImport("instaloader")
+tabulate = LazyImport("tabulate", "tabulate")
+FPDF = LazyImport("fpdf", "FPDF")
+Fore = LazyImport("colorama", "Fore", on_load=_init_colorama)
+Style = LazyImport("colorama", "Style", on_load=_init_colorama)
 # ---------- Config ----------
 OUTPUT_DIR = "output"
 REPORTS_DIR = os.path.join(OUTPUT_DIR, "reports")
 DOWNLOADS_DIR = os.path.join(OUTPUT_DIR, "downloads")
-os.makedirs(REPORTS_DIR, exist_ok=True)
-os.makedirs(DOWNLOADS_DIR, exist_ok=True)
+CACHE_DIR = os.path.join(OUTPUT_DIR, "cache")
+CACHE_DB = os.path.join(CACHE_DIR, "profiles.sqlite3")
+# Content-addressed store: one hardlinked copy of every distinct media file, named by its SHA-256
+CAS_DIR = os.path.join(OUTPUT_DIR, "cas")
+# Seconds a cached profile is served without going back to the network
+CACHE_TTL = int(os.environ.get("IG_OSINT_CACHE_TTL", 6 * 3600))
+# Seconds a HIBP answer (including "no breach") is reused before asking the service again
+HIBP_TTL = int(os.environ.get("IG_OSINT_HIBP_TTL", 24 * 3600))
+
+def ensure_dir(path):
+    """
+    Output folders are created on first write rather than at import time.
+    """
+    if path:
+        os.makedirs(path, exist_ok=True)
+    return path
 
 # =========================
 # Animated UI helpers added
 # =========================
 
-def radar_scan(duration=6):
+# Animations only make sense on an interactive terminal; IG_OSINT_HEADLESS=1 turns them off entirely.
+ANIMATIONS = {"enabled": sys.stdout.isatty() and not os.environ.get("IG_OSINT_HEADLESS")}
+
+RADAR_FRAMES = [
+    " [◐] Scanning target...",
+    " [◓] Scanning target...",
+    " [◑] Scanning target...",
+    " [◒] Scanning target...",
+    " [✦] Triangulating signals...",
+    " [✸] Checking metadata...",
+    " [✹] Collecting intelligence...",
+    " [✦] Finalizing OSINT..."
+]
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024.0
+
+class Activity:
     """
-    Animated ASCII radar / scanning indicator.
-    Non-blocking to output (blocks only for 'duration' seconds while showing animation).
-    """
-    frames = [
-        " [◐] Scanning target...",
-        " [◓] Scanning target...",
-        " [◑] Scanning target...",
-        " [◒] Scanning target...",
-        " [✦] Triangulating signals...",
-        " [✸] Checking metadata...",
-        " [✹] Collecting intelligence...",
-        " [✦] Finalizing OSINT..."
-    ]
-    start = time.time()
-    try:
-        while time.time() - start < duration:
-            for frame in frames:
-                # break early if time exceeded
-                if time.time() - start >= duration:
-                    break
-                sys.stdout.write(f"\r{Fore.CYAN}{frame}{Style.RESET_ALL}")
-                sys.stdout.flush()
-                time.sleep(0.12)
-    except KeyboardInterrupt:
-        # allow user to interrupt animations
-        sys.stdout.write("\r")
+    Background animation that runs on its own thread while the real work runs on the caller's.
+    The work reports progress through advance()/set_total(); the animation stops as soon as
+    the `with` block exits and prints a single completion line.
+    """
+    def __init__(self, frames, done_text, color=None, style="spinner", total=None, unit="", interval=0.12):
+        self.frames = frames
+        self.done_text = done_text
+        self.color = color or Fore.CYAN
+        self.style = style
+        self.total = total
+        self.unit = unit
+        self.interval = interval
+        self.count = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._width = 0
+
+    def advance(self, n=1):
+        self.count += n
+
+    def set_total(self, total):
+        self.total = total
+
+    def _progress_text(self):
+        count = format_bytes(self.count) if self.unit == "bytes" else self.count
+        if self.total:
+            total = format_bytes(self.total) if self.unit == "bytes" else self.total
+            text = f"{count}/{total}"
+        elif self.count:
+            text = f"{count}"
+        else:
+            return ""
+        if self.unit and self.unit != "bytes":
+            text += f" {self.unit}"
+        return text
+
+    def _line(self, i):
+        if self.style == "bar":
+            width = 30
+            if self.total:
+                filled = min(width, int(width * self.count / self.total))
+                bar = "█" * filled + "." * (width - filled)
+                pct = f" {min(100, int(100 * self.count / self.total))}%"
+            else:
+                # Unknown total: bounce a block back and forth
+                pos = i % (2 * width - 2)
+                pos = pos if pos < width else 2 * width - 2 - pos
+                bar = "." * pos + "█" + "." * (width - pos - 1)
+                pct = ""
+            line = f"{self.frames[0]}: [{bar}]{pct}"
+        else:
+            line = self.frames[i % len(self.frames)]
+        progress = self._progress_text()
+        return f"{line}  {progress}" if progress else line
+
+    def _write(self, text, end=""):
+        self._width = max(self._width, len(text))
+        sys.stdout.write("\r" + text.ljust(self._width) + end)
         sys.stdout.flush()
-        return
-    sys.stdout.write(f"\r{Fore.GREEN}[✔] Scan Completed.{Style.RESET_ALL}          \n")
-    sys.stdout.flush()
 
-def progress_bar(task="Processing", duration=4):
+    def _run(self):
+        i = 0
+        while True:
+            self._write(f"{self.color}{self._line(i)}{Style.RESET_ALL}")
+            i += 1
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        if exc_type is KeyboardInterrupt:
+            self._write("", end="\n")
+        elif exc_type is not None:
+            self._write(f"{Fore.RED}[✘] {self.frames[0].strip()} - Failed.{Style.RESET_ALL}", end="\n")
+        else:
+            progress = self._progress_text()
+            done = f"{self.done_text} ({progress})" if progress else self.done_text
+            self._write(f"{Fore.GREEN}{done}{Style.RESET_ALL}", end="\n")
+        return False
+
+class _NullActivity:
     """
-    Simple progress bar that runs for 'duration' seconds.
+    Stand-in used in headless mode: no thread, no output, every call is a no-op.
     """
-    total = 30
-    interval = max(duration / total, 0.01)
-    try:
-        for i in range(total + 1):
-            filled = "█" * i
-            empty = "." * (total - i)
-            sys.stdout.write(f"\r{Fore.YELLOW}{task}: [{filled}{empty}] {int((i/total)*100)}%{Style.RESET_ALL}")
-            sys.stdout.flush()
-            time.sleep(interval)
-    except KeyboardInterrupt:
-        sys.stdout.write("\n")
-        return
-    sys.stdout.write("\n")
-    sys.stdout.flush()
+    count = 0
+    total = None
+
+    def advance(self, n=1):
+        pass
+
+    def set_total(self, total):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+NULL_ACTIVITY = _NullActivity()
+
+def radar_scan(total=None, unit=""):
+    """
+    Animated ASCII radar / scanning indicator.
+    Use as a context manager around the work; it animates until the block finishes.
+    """
+    if not ANIMATIONS["enabled"]:
+        return NULL_ACTIVITY
+    return Activity(RADAR_FRAMES, "[✔] Scan Completed.", total=total, unit=unit)
+
+def progress_bar(task="Processing", total=None, unit=""):
+    """
+    Progress bar driven by the work's own advance() calls (bounces while the total is unknown).
+    """
+    if not ANIMATIONS["enabled"]:
+        return NULL_ACTIVITY
+    return Activity([task], f"[✔] {task} - Done.", color=Fore.YELLOW, style="bar", total=total, unit=unit)
 
 def heartbeat(text="Establishing secure channel"):
     """
-    Short heartbeat animation used for authentication / external checks.
+    Heartbeat animation used for authentication / external checks.
     """
-    try:
-        for i in range(3):
-            sys.stdout.write(f"\r{Fore.CYAN}▮▯ {text} ▯▮{Style.RESET_ALL}")
-            sys.stdout.flush()
-            time.sleep(0.35)
-            sys.stdout.write(f"\r{Fore.CYAN}▯▮ {text} ▮▯{Style.RESET_ALL}")
-            sys.stdout.flush()
-            time.sleep(0.35)
-    except KeyboardInterrupt:
-        sys.stdout.write("\n")
-        return
-    sys.stdout.write(f"\r{Fore.GREEN}[✔] {text} - Done.{Style.RESET_ALL}\n")
-    sys.stdout.flush()
+    if not ANIMATIONS["enabled"]:
+        return NULL_ACTIVITY
+    return Activity([f"▮▯ {text} ▯▮", f"▯▮ {text} ▮▯"], f"[✔] {text} - Done.", interval=0.35)
+
+# ---------- Instrumentation ----------
+# Off unless IG_OSINT_TRACE names an output file (or enable_tracing() is called). While off a
+# traced function costs one dict lookup and count() returns straight away.
+TRACE_FILE = os.environ.get("IG_OSINT_TRACE")
+TRACE = {"enabled": False, "origin": 0.0, "events": [], "counters": defaultdict(float)}
+_TRACE_LOCK = threading.Lock()
+# Spans open in the current thread, innermost last
+_SPANS = threading.local()
+
+def enable_tracing():
+    TRACE.update(enabled=True, origin=time.perf_counter(), events=[], counters=defaultdict(float))
+    # Route requests through the transport hook so every HTTP call is counted
+    _install_transport_hook()
+
+def count(name, n=1):
+    if TRACE["enabled"]:
+        with _TRACE_LOCK:
+            TRACE["counters"][name] += n
+        # Only the spans of this thread: work running next to a span is not charged to it
+        for open_span in getattr(_SPANS, "stack", ()):
+            open_span.moved[name] += n
+
+class Span:
+    """
+    One timed phase. On exit it records a Chrome-trace "complete" event whose args are the
+    counters (requests, bytes, files, sleep) counted by its own thread while it ran; work a
+    phase hands to a pool shows up in the spans opened on the pool threads.
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.moved = defaultdict(float)
+        if not hasattr(_SPANS, "stack"):
+            _SPANS.stack = []
+        _SPANS.stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        _SPANS.stack.remove(self)
+        moved = {k: round(v, 6) for k, v in self.moved.items() if v}
+        if exc_type is not None:
+            moved["error"] = exc_type.__name__
+        TRACE["events"].append({"name": self.name, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+                                "ts": round((self.start - TRACE["origin"]) * 1e6, 1),
+                                "dur": round((end - self.start) * 1e6, 1), "args": moved})
+        return False
+
+def span(name):
+    return Span(name) if TRACE["enabled"] else NULL_ACTIVITY
+
+def traced(fn):
+    """
+    Record every call of fn as a span while tracing is on.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not TRACE["enabled"]:
+            return fn(*args, **kwargs)
+        with Span(fn.__name__):
+            return fn(*args, **kwargs)
+    return wrapper
+
+def _timed_sleep(sleep, counter):
+    def wrapper(*args):
+        start = time.perf_counter()
+        try:
+            return sleep(*args)
+        finally:
+            count(counter, time.perf_counter() - start)
+    return wrapper
+
+def trace_summary():
+    """
+    Per-phase totals: calls, wall time and the counters each phase moved, plus overall counters.
+    """
+    phases = {}
+    for event in TRACE["events"]:
+        phase = phases.setdefault(event["name"], {"calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+        ms = event["dur"] / 1000
+        phase["calls"] += 1
+        phase["total_ms"] = round(phase["total_ms"] + ms, 3)
+        phase["max_ms"] = max(phase["max_ms"], round(ms, 3))
+        for key, value in event["args"].items():
+            if isinstance(value, (int, float)):
+                phase[key] = round(phase.get(key, 0) + value, 6)
+    return {"wall_ms": round((time.perf_counter() - TRACE["origin"]) * 1000, 3),
+            "counters": {k: round(v, 6) for k, v in sorted(TRACE["counters"].items())},
+            "phases": phases}
+
+def export_trace(path):
+    """
+    Write the Chrome trace (chrome://tracing, Perfetto) to path and the JSON summary next to it
+    as <name>.summary.json. Returns the summary path.
+    """
+    ensure_dir(os.path.dirname(path))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": TRACE["events"], "displayTimeUnit": "ms"}, f)
+    summary_path = os.path.splitext(path)[0] + ".summary.json"
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(trace_summary(), f, indent=2)
+    return summary_path
 
 # ---------- Helpers ----------
 def clear():
-    os.system("cls" if os.name == "nt" else "clear")
+    # ANSI clear + home instead of spawning a shell; colorama translates it on Windows consoles
+    if sys.stdout.isatty():
+        reset = Style.RESET_ALL  # first colorama use installs its Windows console wrapper
+        sys.stdout.write(reset + "\033[2J\033[H")
+        sys.stdout.flush()
 
 def extract_username(url_or_username):
     if not url_or_username:
@@ -119,26 +373,342 @@ def suggest_usernames(username):
     base = re.sub(r'\W+', '', username)[:20]
     return [f"{base}_official", f"{base}_real", f"{base}123", f"{base}_01", f"{base}.official"]
 
+# ---------- HTTP transport ----------
+# Every request - Instaloader's sessions, the throwaway anonymous sessions it makes per download,
+# and requests.get for HIBP - picks its adapter through requests.Session.get_adapter, so routing
+# that one method is enough to point the whole tool at a stand-in (see benchmarks/).
+_TRANSPORTS = []
+_SESSION_GET_ADAPTER = []
+
+class _CountingAdapter:
+    """
+    Wraps the adapter chosen for a request while tracing, counting requests and bytes received.
+    """
+    def __init__(self, inner):
+        self.inner = inner
+
+    def send(self, request, **kwargs):
+        resp = self.inner.send(request, **kwargs)
+        count("http.requests")
+        count("http.bytes_received", int(resp.headers.get("Content-Length") or 0))
+        if resp.status_code == 429:
+            count("http.429")
+        return resp
+
+    def close(self):
+        self.inner.close()
+
+def _routed_get_adapter(session, url):
+    # The topmost plain adapter answers; layers with wrap() above it (a Cassette) are wrapped around it
+    base = max((i for i, layer in enumerate(_TRANSPORTS) if not hasattr(layer, "wrap")), default=-1)
+    adapter = _TRANSPORTS[base] if base >= 0 else _SESSION_GET_ADAPTER[0](session, url)
+    for layer in _TRANSPORTS[base + 1:]:
+        adapter = layer.wrap(adapter)
+    return _CountingAdapter(adapter) if TRACE["enabled"] else adapter
+
+def _install_transport_hook():
+    if not _SESSION_GET_ADAPTER:
+        _SESSION_GET_ADAPTER.append(requests.Session.get_adapter)
+        requests.Session.get_adapter = _routed_get_adapter
+
+class Transport:
+    """
+    Context manager that sends every HTTP request made inside it through adapter
+    (a requests.adapters.BaseAdapter) instead of the network. Nested transports stack; an
+    adapter with a wrap(inner) method is layered over the one below it instead of replacing it.
+    """
+    def __init__(self, adapter):
+        self.adapter = adapter
+
+    def __enter__(self):
+        _install_transport_hook()
+        _TRANSPORTS.append(self.adapter)
+        return self.adapter
+
+    def __exit__(self, exc_type, exc, tb):
+        _TRANSPORTS.remove(self.adapter)
+        return False
+
+# ---------- Record / replay ----------
+# IG_OSINT_RECORD=<file> appends every HTTP exchange of a run to a cassette; IG_OSINT_REPLAY=<file>
+# answers every request from it without touching the network, so a recorded analysis can be re-run
+# (profile, downloads, reports) offline, and every replay gives identical results.
+RECORD_FILE = os.environ.get("IG_OSINT_RECORD")
+REPLAY_FILE = os.environ.get("IG_OSINT_REPLAY")
+# Headers that describe the wire encoding; bodies are stored decoded
+CASSETTE_DROP_HEADERS = {"content-encoding", "transfer-encoding", "content-length"}
+# Instagram cookies that identify a login; a cassette keeps them, but with a placeholder value
+CASSETTE_SECRET_COOKIES = {"sessionid", "ds_user_id", "csrftoken", "rur", "mid", "ig_did", "shbid", "shbts"}
+CASSETTE_REDACTED = "redacted"
+# Login form fields; request keys hash them redacted, so a cassette gives nothing to brute-force
+# (enc_password is "#PWD_INSTAGRAM_BROWSER:0:<timestamp>:<password>")
+CASSETTE_SECRET_FIELDS = {"enc_password", "password", "verificationCode"}
+
+def _redact_cookie(header):
+    """A Set-Cookie value with the value of a session cookie replaced, attributes kept."""
+    name, _, rest = header.partition("=")
+    if name.strip().lower() not in CASSETTE_SECRET_COOKIES:
+        return header
+    _, sep, attributes = rest.partition(";")
+    return f"{name}={CASSETTE_REDACTED}{sep}{attributes}"
+
+class _RecordedMessage:
+    """Just enough of http.client.HTTPResponse for requests to read Set-Cookie headers."""
+    def __init__(self, headers):
+        import http.client
+        self.msg = http.client.HTTPMessage()
+        for name, value in headers:
+            self.msg[name] = value
+
+    def isclosed(self):
+        return True
+
+    def close(self):
+        pass
+
+class _CassetteAdapter:
+    def __init__(self, cassette, inner=None):
+        self.cassette = cassette
+        self.inner = inner
+
+    def send(self, request, **kwargs):
+        if self.inner is None:
+            return self.cassette.play(request)
+        resp = self.inner.send(request, **kwargs)
+        return self.cassette.record(request, resp)
+
+    def close(self):
+        if self.inner is not None:
+            self.inner.close()
+
+class Cassette:
+    """
+    HTTP exchanges in a SQLite file. Requests are keyed by a hash of method, URL (query sorted)
+    and body, and a key seen several times keeps each answer in order (seq), so lookups are
+    primary-key reads. Bodies are zlib-compressed and stored once per distinct content.
+    Use as a Transport layer: recording wraps the real adapter, replaying answers by itself
+    and fails any request that was never recorded.
+    """
+    def __init__(self, path, replay=False):
+        import sqlite3
+        if replay and not os.path.exists(path):
+            raise FileNotFoundError(f"No cassette at {path}")
+        ensure_dir(os.path.dirname(path))
+        self.path = path
+        self.replaying = replay
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS exchanges (
+                key TEXT, seq INTEGER, method TEXT, url TEXT, status INTEGER, reason TEXT,
+                headers TEXT, body_sha256 TEXT, PRIMARY KEY (key, seq)) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS bodies (sha256 TEXT PRIMARY KEY, data BLOB) WITHOUT ROWID;
+        """)
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO meta VALUES ('recorded_at', ?)", (str(time.time()),))
+        self.recorded_at = float(self.conn.execute(
+            "SELECT value FROM meta WHERE name = 'recorded_at'").fetchone()[0])
+        # Per key: times seen in this run (replay) or next free seq (record)
+        self._seen = {}
+        self._lock = threading.Lock()
+        self._builder = requests.adapters.HTTPAdapter()
+
+    @staticmethod
+    def request_key(request):
+        url = urlparse(request.url)
+        from urllib.parse import parse_qsl, urlencode
+        query = urlencode(sorted(parse_qsl(url.query, keep_blank_values=True)))
+        body = request.body or b""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if "x-www-form-urlencoded" in request.headers.get("Content-Type", ""):
+            form = parse_qsl(body.decode("utf-8", "replace"), keep_blank_values=True)
+            if any(name in CASSETTE_SECRET_FIELDS for name, _ in form):
+                body = urlencode([(name, CASSETTE_REDACTED if name in CASSETTE_SECRET_FIELDS else value)
+                                  for name, value in form]).encode("utf-8")
+        digest = hashlib.sha256(f"{request.method} {url._replace(query=query).geturl()}\n".encode("utf-8"))
+        digest.update(body)
+        return digest.hexdigest()
+
+    def wrap(self, inner):
+        return _CassetteAdapter(self, None if self.replaying else inner)
+
+    def record(self, request, resp):
+        """
+        Store one exchange and hand back an equivalent response. Session cookies are stored
+        redacted (the live run still gets the real ones), so a login replayed from the cassette
+        ends up with placeholder cookies that the real site would not accept.
+        """
+        body = resp.content
+        headers = [(k, v) for k, v in getattr(resp.raw, "headers", resp.headers).items()
+                   if k.lower() not in CASSETTE_DROP_HEADERS]
+        stored = [(k, _redact_cookie(v) if k.lower() == "set-cookie" else v) for k, v in headers]
+        body_sha = hashlib.sha256(body).hexdigest()
+        key = self.request_key(request)
+        with self._lock:
+            seq = self._seen.get(key)
+            if seq is None:
+                seq = self.conn.execute("SELECT COALESCE(MAX(seq) + 1, 0) FROM exchanges WHERE key = ?",
+                                        (key,)).fetchone()[0]
+            self._seen[key] = seq + 1
+            with self.conn:
+                self.conn.execute("INSERT OR IGNORE INTO bodies VALUES (?, ?)", (body_sha, zlib.compress(body, 6)))
+                self.conn.execute("INSERT INTO exchanges VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                  (key, seq, request.method, request.url, resp.status_code, resp.reason,
+                                   json.dumps(stored), body_sha))
+        count("cassette.recorded")
+        return self._response(request, resp.status_code, resp.reason, headers, body)
+
+    def play(self, request):
+        key = self.request_key(request)
+        with self._lock:
+            seq = self._seen.get(key, 0)
+            self._seen[key] = seq + 1
+            # Past the recorded answers a repeated request gets the last one again
+            row = self.conn.execute(
+                "SELECT e.status, e.reason, e.headers, b.data FROM exchanges e JOIN bodies b "
+                "ON b.sha256 = e.body_sha256 WHERE e.key = ? AND e.seq <= ? ORDER BY e.seq DESC LIMIT 1",
+                (key, seq)).fetchone()
+        if row is None:
+            raise requests.exceptions.ConnectionError(
+                f"Not in cassette {self.path}: {request.method} {request.url}", request=request)
+        count("cassette.replayed")
+        status, reason, headers, data = row
+        return self._response(request, status, reason, json.loads(headers), zlib.decompress(data))
+
+    def _response(self, request, status, reason, headers, body):
+        import urllib3
+        headers = [("Content-Length", str(len(body)))] + [tuple(h) for h in headers]
+        raw = urllib3.HTTPResponse(body=io.BytesIO(body), headers=headers, status=status, reason=reason,
+                                   preload_content=False, decode_content=False,
+                                   original_response=_RecordedMessage(headers), request_url=request.url)
+        return self._builder.build_response(request, raw)
+
+    def close(self):
+        self.conn.close()
+
+def active_cassette():
+    """The innermost Cassette in use (recording or replaying), or None."""
+    for layer in reversed(_TRANSPORTS):
+        if isinstance(layer, Cassette):
+            return layer
+    return None
+
+def replaying():
+    """True while every answer comes from a cassette instead of the network."""
+    cassette = active_cassette()
+    return bool(cassette and cassette.replaying)
+
+def clock():
+    """
+    Timestamp for dates the tool makes up itself (PDF creation date, archive checksums, the
+    download journal). While replaying this is the cassette's recording time, so every replay
+    writes the same files byte for byte; recording runs use the real time.
+    """
+    return active_cassette().recorded_at if replaying() else time.time()
+
 # ---------- Instaloader functions ----------
-def create_instaloader_session(login_user=None, login_pass=None, sessionfile=None):
+# One Instaloader shared by every flow; "verified" flips once the saved session has been tested
+SESSION = {"loader": None, "user": None, "verified": False}
+LAST_SESSION_FILE = os.path.join(CACHE_DIR, "last_session.json")
+
+def session_file(user):
+    return os.path.join(CACHE_DIR, f"session-{user}")
+
+def _unless_replaying(sleep):
+    def wrapper(*args):
+        if not replaying():
+            sleep(*args)
+    return wrapper
+
+def _new_instaloader():
     L = instaloader.Instaloader(dirname_pattern=".", download_pictures=False, download_videos=False,
-                                save_metadata=False, post_metadata_txt_pattern="")
+                                save_metadata=False, post_metadata_txt_pattern="", quiet=True)
+    # Every answer of a replay comes from the cassette; the politeness delays would only slow it down
+    L.context.do_sleep = _unless_replaying(L.context.do_sleep)
+    L.context._rate_controller.sleep = _unless_replaying(L.context._rate_controller.sleep)
+    if TRACE["enabled"]:
+        # Instaloader's random per-request delay and its rate-limit waits
+        L.context.do_sleep = _timed_sleep(L.context.do_sleep, "sleep.request_delay_s")
+        L.context._rate_controller.sleep = _timed_sleep(L.context._rate_controller.sleep, "sleep.rate_limit_s")
+    return L
+
+@traced
+def create_instaloader_session(login_user=None, login_pass=None, sessionfile=None):
+    """
+    Return the shared Instaloader, creating it on first use. For a login the saved session
+    file is reused if there is one; the password is only sent when there is no saved session
+    or the saved one has expired. Fresh logins are written back with save_session_to_file.
+    """
+    L = SESSION["loader"]
+    if L is not None and SESSION["user"] == login_user and (SESSION["verified"] or not login_user):
+        return L
+    if L is None or SESSION["user"] != login_user:
+        L = _new_instaloader()
+        SESSION.update(loader=L, user=login_user, verified=False)
+    if not login_user:
+        return L
+    path = sessionfile or session_file(login_user)
     try:
-        if login_user and login_pass:
+        if not L.context.is_logged_in and os.path.exists(path):
+            L.load_session_from_file(login_user, path)
+        if L.context.is_logged_in and L.test_login() == login_user:
+            SESSION["verified"] = True
+        elif login_pass:
+            # No saved session, or it has expired: this is the only place we actually log in
+            if L.context.is_logged_in:
+                L = _new_instaloader()
+                SESSION["loader"] = L
             L.login(login_user, login_pass)
-        elif sessionfile:
-            L.load_session_from_file(sessionfile)
+            ensure_dir(os.path.dirname(path))
+            L.save_session_to_file(path)
+            SESSION["verified"] = True
+        elif L.context.is_logged_in:
+            # Expired and no password to renew it: drop the stale cookies and carry on anonymously
+            print(Fore.YELLOW + "[!] Saved Instagram session has expired; set the login again (option 5)." + Style.RESET_ALL,
+                  file=sys.stderr)
+            if os.path.exists(path):
+                os.remove(path)
+            L = _new_instaloader()
+            SESSION["loader"] = L
+        if SESSION["verified"]:
+            ensure_dir(CACHE_DIR)
+            with open(LAST_SESSION_FILE, "w", encoding="utf-8") as f:
+                json.dump({"user": login_user, "sessionfile": path}, f)
     except Exception as e:
-        print(Fore.YELLOW + f"[!] Instaloader login/session failed: {e}" + Style.RESET_ALL)
+        print(Fore.YELLOW + f"[!] Instaloader login/session failed: {e}" + Style.RESET_ALL, file=sys.stderr)
     return L
 
-def fetch_profile(L, username):
+def restore_saved_session():
+    """
+    Username of the session saved by the previous run, or None. Nothing is loaded here:
+    create_instaloader_session picks the session file up (and tests it) on first use.
+    """
+    try:
+        with open(LAST_SESSION_FILE, encoding="utf-8") as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not os.path.exists(saved.get("sessionfile", "")):
+        return None
+    return saved["user"]
+
+def clear_saved_session():
+    user = SESSION["user"]
+    SESSION.update(loader=None, user=None, verified=False)
+    for path in (LAST_SESSION_FILE, session_file(user) if user else None):
+        if path and os.path.exists(path):
+            os.remove(path)
+
+@traced
+def fetch_profile(L, username, progress=None, full=False):
+    progress = progress or NULL_ACTIVITY
     try:
         profile = instaloader.Profile.from_username(L.context, username)
-        # Count reels (video) - try, but can be slow for many posts
+        # Walk the feed once into the post spool; reels are counted on the way through
         reel_count = None
         try:
-            reel_count = sum(1 for p in profile.get_posts() if getattr(p, "typename", "") == "GraphVideo")
+            reel_count = write_post_spool(profile, profile.username, progress, full=full)["reels"]
         except Exception:
             reel_count = None
         data = {
@@ -157,60 +727,1598 @@ def fetch_profile(L, username):
     except Exception as e:
         return False, str(e), None
 
+# ---------- Post metadata spool ----------
+def spool_path(username):
+    return os.path.join(CACHE_DIR, f"{username}_posts.ndjson")
+
+def post_record(post):
+    """
+    One spool line: a few flat fields for quick scans plus the raw node,
+    so the Post can be rebuilt later with load_structure() without paging the feed again.
+    """
+    return {
+        "shortcode": post.shortcode,
+        "typename": post.typename,
+        "is_video": post.is_video,
+        "date_utc": post.date_utc.isoformat(),
+        "is_pinned": post.is_pinned,
+        "structure": instaloader.get_json_structure(post),
+    }
+
+@traced
+def write_post_spool(profile, username, progress=None, full=False):
+    """
+    Page through profile.get_posts() exactly once, writing one NDJSON line per post.
+    Memory stays flat regardless of post count. The spool only replaces the previous
+    one once the walk has finished, so an interrupted walk never leaves a truncated spool.
+
+    If a spool already exists (and full=False) paging stops at the first non-pinned post it
+    already holds - the feed is newest-first, so everything after it is known - and the
+    older records are carried over. Deleted posts are only noticed by a full walk, so one is
+    done anyway if that leaves more posts spooled than the profile has.
+    Returns {"posts": n, "reels": n}.
+    """
+    progress = progress or NULL_ACTIVITY
+    progress.set_total(profile.mediacount)
+    path = spool_path(username)
+    tmp_path = path + ".tmp"
+    ensure_dir(CACHE_DIR)
+    known = set() if full else {r["shortcode"] for r in iter_spooled_posts(username)}
+    written = set()
+    summary = {"posts": 0, "reels": 0}
+
+    def add(f, line, record):
+        f.write(line)
+        written.add(record["shortcode"])
+        summary["posts"] += 1
+        if record["typename"] == "GraphVideo":
+            summary["reels"] += 1
+        progress.advance()
+
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            caught_up = False
+            for post in profile.get_posts():
+                if post.shortcode in known and not post.is_pinned:
+                    caught_up = True
+                    break
+                record = post_record(post)
+                add(f, json.dumps(record, ensure_ascii=False, default=str) + "\n", record)
+            if caught_up:
+                with open(path, encoding="utf-8") as old:
+                    for line in old:
+                        record = json.loads(line)
+                        if record["shortcode"] not in written:
+                            add(f, line, record)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    if not full and summary["posts"] > profile.mediacount:
+        count("spool.full_walks")
+        return write_post_spool(profile, username, progress, full=True)
+    return summary
+
+def iter_spooled_posts(username):
+    """
+    Stream spool records back one at a time (nothing if the profile was never spooled).
+    """
+    path = spool_path(username)
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def spool_summary(username):
+    """
+    Post / reel counts read back from the spool, or None if there is no spool.
+    """
+    if not os.path.exists(spool_path(username)):
+        return None
+    summary = {"posts": 0, "reels": 0}
+    for record in iter_spooled_posts(username):
+        summary["posts"] += 1
+        if record["typename"] == "GraphVideo":
+            summary["reels"] += 1
+    return summary
+
+# ---------- Profile metadata cache ----------
+def cache_connect():
+    import sqlite3
+    ensure_dir(CACHE_DIR)
+    conn = sqlite3.connect(CACHE_DB)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS profiles (
+            username TEXT PRIMARY KEY,
+            profile_id INTEGER,
+            fetched_at REAL NOT NULL,
+            data TEXT NOT NULL,
+            structure TEXT
+        );
+        CREATE INDEX IF NOT EXISTS profiles_by_id ON profiles (profile_id);
+        CREATE TABLE IF NOT EXISTS posts (
+            profile_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            shortcode TEXT NOT NULL,
+            record TEXT NOT NULL,
+            PRIMARY KEY (profile_id, position)
+        );
+        CREATE TABLE IF NOT EXISTS file_hashes (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            sha256 TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS videos (
+            sha256 TEXT PRIMARY KEY,
+            info TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS breaches (
+            account TEXT PRIMARY KEY,
+            checked_at REAL NOT NULL,
+            status TEXT NOT NULL
+        );
+    """)
+    return conn
+
+def cache_store(data, profile=None):
+    """
+    Save the dict returned by fetch_profile, the Profile structure (so a Profile can be rebuilt
+    offline) and the spooled per-post metadata.
+    """
+    username = data["username"]
+    structure = json.dumps(instaloader.get_json_structure(profile), default=str) if profile else None
+    conn = cache_connect()
+    try:
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?, ?)",
+                         (username.lower(), data["profile_id"], time.time(),
+                          json.dumps(data, ensure_ascii=False), structure))
+            if os.path.exists(spool_path(username)):
+                conn.execute("DELETE FROM posts WHERE profile_id = ?", (data["profile_id"],))
+                with open(spool_path(username), encoding="utf-8") as f:
+                    conn.executemany("INSERT INTO posts VALUES (?, ?, ?, ?)",
+                                     ((data["profile_id"], i, json.loads(line)["shortcode"], line.rstrip("\n"))
+                                      for i, line in enumerate(f) if line.strip()))
+    finally:
+        conn.close()
+
+def cache_load(username=None, profile_id=None, ttl=None):
+    """
+    Look a profile up by username or profile_id. Returns {"data", "structure", "age"} when a
+    cached copy younger than ttl exists (ttl=None means any age), else None.
+    Re-creates the post spool from the cached posts if it is missing.
+    """
+    if not os.path.exists(CACHE_DB):
+        return None
+    conn = cache_connect()
+    try:
+        if username is not None:
+            row = conn.execute("SELECT profile_id, fetched_at, data, structure FROM profiles WHERE username = ?",
+                               (username.lower(),)).fetchone()
+        else:
+            row = conn.execute("SELECT profile_id, fetched_at, data, structure FROM profiles WHERE profile_id = ?",
+                               (profile_id,)).fetchone()
+        if row is None:
+            return None
+        pid, fetched_at, data, structure = row
+        age = time.time() - fetched_at
+        if ttl is not None and age > ttl:
+            return None
+        data = json.loads(data)
+        path = spool_path(data["username"])
+        if not os.path.exists(path):
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                for (record,) in conn.execute("SELECT record FROM posts WHERE profile_id = ? ORDER BY position", (pid,)):
+                    f.write(record + "\n")
+            os.replace(path + ".tmp", path)
+        return {"data": data, "structure": json.loads(structure) if structure else None, "age": age}
+    finally:
+        conn.close()
+
+def cache_latest():
+    """
+    The most recently fetched profile's data dict (any age), or None.
+    """
+    if not os.path.exists(CACHE_DB):
+        return None
+    conn = cache_connect()
+    try:
+        row = conn.execute("SELECT data FROM profiles ORDER BY fetched_at DESC LIMIT 1").fetchone()
+        return json.loads(row[0]) if row else None
+    finally:
+        conn.close()
+
+def fetch_profile_cached(L, username, force_refresh=False, ttl=None, progress=None, full=False):
+    """
+    fetch_profile() behind the on-disk cache. Returns (ok, data_or_error, profile_obj, from_cache);
+    on a cache hit no request is made and profile_obj is None. force_refresh only skips the cache:
+    the feed is still walked incrementally unless full=True.
+    """
+    if not force_refresh:
+        cached = cache_load(username, ttl=CACHE_TTL if ttl is None else ttl)
+        if cached:
+            return True, cached["data"], None, True
+    ok, result, profile_obj = fetch_profile(L, username, progress=progress, full=full)
+    if ok:
+        cache_store(result, profile_obj)
+    return ok, result, profile_obj, False
+
+def format_age(seconds):
+    if seconds < 60:
+        return f"{int(seconds)}s"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}m"
+    return f"{seconds / 3600:.1f}h"
+
+# ---------- Download manifest ----------
+MANIFEST_NAME = ".manifest.ndjson"
+PROFILE_PIC_KEY = "__profile_pic__"
+
+class DownloadManifest:
+    """
+    Append-only NDJSON journal kept in each download folder. Every post gets a "begin" line
+    listing its files before anything is fetched and a "complete" line with the final sizes
+    afterwards; the last line for a shortcode wins. A "synced" line records the newest post
+    covered by a download that ran to the end.
+    """
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = os.path.join(folder, MANIFEST_NAME)
+        self.entries = {}
+        self.synced_through = None
+        lines = 0
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # torn last line from an interrupted write
+                        continue
+                    lines += 1
+                    if "synced_through" in entry:
+                        self.synced_through = entry["synced_through"]
+                    else:
+                        self.entries[entry["shortcode"]] = entry
+        if lines > 2 * len(self.entries) + 100:
+            self._compact()
+        self._fh = open(self.path, "a", encoding="utf-8")
+
+    def _compact(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry) + "\n")
+            if self.synced_through:
+                f.write(json.dumps({"synced_through": self.synced_through}) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def _append(self, entry):
+        self._fh.write(json.dumps(entry) + "\n")
+        self._fh.flush()
+
+    def recorded_size(self, shortcode, name):
+        entry = self.entries.get(shortcode)
+        if entry and entry["complete"]:
+            return entry["files"].get(name)
+        return None
+
+    def is_complete(self, shortcode):
+        """
+        True if the post finished downloading and every file is still on disk at its recorded size.
+        """
+        entry = self.entries.get(shortcode)
+        if not entry or not entry["complete"]:
+            return False
+        for name, size in entry["files"].items():
+            try:
+                if os.path.getsize(os.path.join(self.folder, name)) != size:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def begin(self, shortcode, names):
+        entry = {"shortcode": shortcode, "complete": False, "files": {name: None for name in names}}
+        self._append(entry)
+
+    def finish(self, shortcode, sizes):
+        entry = {"shortcode": shortcode, "complete": True, "files": sizes}
+        self.entries[shortcode] = entry
+        self._append(entry)
+
+    def mark_synced(self, shortcode):
+        self.synced_through = shortcode
+        self._append({"synced_through": shortcode})
+
+    def close(self, compact=False):
+        self._fh.close()
+        if compact:
+            self._compact()
+
+def media_extension(url, default):
+    ext = os.path.splitext(urlparse(url).path)[1].lower()
+    return ext if re.fullmatch(r"\.[a-z0-9]{2,5}", ext) else default
+
+def post_media(post):
+    """
+    (url, filename) for every file of a post, named the way Instaloader names them:
+    <date>_UTC[_<n>].jpg plus .mp4 for videos (the .jpg is the video thumbnail).
+    """
+    base = post.date_utc.strftime("%Y-%m-%d_%H-%M-%S") + "_UTC"
+    if post.typename == "GraphSidecar":
+        items = [(f"{base}_{i}", n.is_video, n.display_url, n.video_url)
+                 for i, n in enumerate(post.get_sidecar_nodes(), start=1)]
+    else:
+        items = [(base, post.is_video, post.url, post.video_url if post.is_video else None)]
+    files = []
+    for name, is_video, pic_url, video_url in items:
+        files.append((pic_url, name + media_extension(pic_url, ".jpg")))
+        if is_video and video_url:
+            files.append((video_url, name + media_extension(video_url, ".mp4")))
+    return files
+
+# ---------- Download engine ----------
+DOWNLOAD_WORKERS = max(1, int(os.environ.get("IG_OSINT_DOWNLOAD_WORKERS", 4)))
+DOWNLOAD_ATTEMPTS = 5
+# Longest pause after a 429, whether from Retry-After or our own backoff
+DOWNLOAD_MAX_BACKOFF = 60
+
+class RateGate:
+    """
+    Pause shared by all download workers. A 429 closes the gate until its Retry-After (or an
+    exponential backoff when there is none) has passed, so every worker slows down at once
+    instead of each one hammering the CDN until it is refused too.
+    """
+    def __init__(self):
+        self.not_before = 0.0
+        self.strikes = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        delay = self.not_before - time.time()
+        if delay > 0:
+            count("sleep.backoff_s", delay)
+            time.sleep(delay)
+
+    def refused(self, retry_after=None):
+        with self._lock:
+            now = time.time()
+            if self.not_before <= now:
+                # Refusals arriving while the gate is already closed belong to the same burst
+                self.strikes += 1
+            delay = retry_after if retry_after is not None else 2 ** self.strikes
+            self.not_before = max(self.not_before, now + min(delay, DOWNLOAD_MAX_BACKOFF))
+
+    def passed(self):
+        self.strikes = 0
+
+def retry_after(resp):
+    """Retry-After in seconds, or None if missing or given as an HTTP date."""
+    try:
+        return max(0.0, float(resp.headers.get("Retry-After", "")))
+    except ValueError:
+        return None
+
+def media_session(context, workers=DOWNLOAD_WORKERS):
+    """
+    One anonymous session for the media CDN with a connection pool sized for the workers,
+    so concurrent fetches reuse keep-alive connections instead of opening new ones.
+    """
+    session = context.get_anonymous_session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+@traced
+def fetch_file(session, url, path, mtime=None, gate=None):
+    """
+    Stream url to path through a .part file that is only renamed into place once complete,
+    so a file under its final name is never a partial one. 429s wait on gate and dropped
+    connections are retried, up to DOWNLOAD_ATTEMPTS tries. Returns the size written.
+    """
+    gate = gate or RateGate()
+    part_path = path + ".part"
+    for attempt in range(1, DOWNLOAD_ATTEMPTS + 1):
+        gate.wait()
+        try:
+            with session.get(url, stream=True) as resp:
+                if resp.status_code == 429:
+                    gate.refused(retry_after(resp))
+                    continue
+                resp.raise_for_status()
+                gate.passed()
+                if mtime is None and resp.headers.get("Last-Modified"):
+                    # No post date (profile picture): keep the CDN's own date instead of ours
+                    from email.utils import parsedate_to_datetime
+                    try:
+                        mtime = parsedate_to_datetime(resp.headers["Last-Modified"])
+                    except (TypeError, ValueError):
+                        pass
+                size = 0
+                with open(part_path, "wb") as f:
+                    for chunk in resp.iter_content(chunk_size=1 << 16):
+                        f.write(chunk)
+                        size += len(chunk)
+        except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError,
+                requests.exceptions.Timeout):
+            if attempt == DOWNLOAD_ATTEMPTS:
+                raise
+            count("http.retries")
+            delay = min(2 ** attempt, DOWNLOAD_MAX_BACKOFF)
+            count("sleep.retry_s", delay)
+            time.sleep(delay)
+            continue
+        os.replace(part_path, path)
+        count("files.downloaded")
+        count("bytes.downloaded", size)
+        if mtime is not None:
+            os.utime(path, (time.time(), mtime.timestamp()))
+        return size
+    raise ConnectionError(f"Still rate limited after {DOWNLOAD_ATTEMPTS} attempts: {url}")
+
+def process_download(path):
+    """
+    Post-processing for one fetched file, run while the other downloads continue: hash it,
+    then cache its gallery thumbnail (images) or parse its moov box (videos).
+    Returns (path, stat, sha256, video info or None).
+    """
+    st = os.stat(path)
+    sha = sha256_file(path)
+    info = None
+    lower = path.lower()
+    if lower.endswith(VIDEO_EXTENSIONS):
+        info = mp4_info(path)
+    elif lower.endswith(GALLERY_EXTENSIONS) and not os.path.exists(gallery_thumb_path(sha)):
+        make_gallery_thumb((path, sha))
+    return path, st, sha, info
+
+@traced
+def download_files(session, jobs, folder, manifest, progress=None):
+    """
+    Fetch the files of every (shortcode, files, mtime, refresh) job with at most DOWNLOAD_WORKERS
+    requests in flight. Files already complete on disk (present, and at the size recorded
+    last time if there was one) are kept. The manifest is only touched from this thread:
+    posts are finished in job order as soon as their files have landed (so the journal does
+    not depend on which download won the race), and each fetched file goes straight
+    to a second pool for process_download, whose results are stored in the hash index and
+    videos table at the end.
+
+    CDN URLs expire, so a file answered with 403/404 is tried once more at the URL from
+    refresh(), which re-fetches the post and returns its (url, filename) list again.
+    A post with a file that could not be fetched is left incomplete in the manifest (the
+    next run retries it) and the rest carry on. Returns {shortcode: error} for those posts.
+    """
+    progress = progress or NULL_ACTIVITY
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+    gate = RateGate()
+    posts = {}      # shortcode -> {"left": files in flight, "sizes": ..., "error": ..., ...}, in job order
+    in_flight = {}  # future -> (shortcode, name, path)
+    processing = []
+    failed = {}
+    with ThreadPoolExecutor(DOWNLOAD_WORKERS) as fetchers, ThreadPoolExecutor(HASH_WORKERS) as helpers:
+        def finish_ready():
+            while posts:
+                shortcode, post = next(iter(posts.items()))
+                if post["left"]:
+                    return
+                del posts[shortcode]
+                if post["error"]:
+                    failed[shortcode] = post["error"]
+                    count("posts.failed")
+                else:
+                    manifest.finish(shortcode, post["sizes"])
+                progress.advance()
+
+        def fresh_url(post, name, error):
+            """The re-fetched URL of a file whose URL the CDN refused, at most once per file."""
+            status = getattr(getattr(error, "response", None), "status_code", None)
+            if status not in (403, 404) or post["refresh"] is None or name in post["retried"]:
+                return None
+            post["retried"].add(name)
+            if post["fresh"] is None:
+                # One refresh per post, however many of its files had expired
+                count("posts.refreshed")
+                try:
+                    post["fresh"] = {fresh_name: url for url, fresh_name in post["refresh"]()}
+                except Exception as e:
+                    post["fresh"] = {}
+                    post["error"] = post["error"] or f"{name}: {error} (refresh failed: {e})"
+            return post["fresh"].get(name)
+
+        def collect():
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                shortcode, name, path = in_flight.pop(future)
+                post = posts[shortcode]
+                post["left"] -= 1
+                try:
+                    post["sizes"][name] = future.result()
+                except Exception as e:
+                    url = fresh_url(post, name, e)
+                    if url:
+                        post["left"] += 1
+                        in_flight[fetchers.submit(fetch_file, session, url, path, post["mtime"], gate)] = \
+                            (shortcode, name, path)
+                    else:
+                        post["error"] = post["error"] or f"{name}: {e}"
+                    continue
+                processing.append(helpers.submit(process_download, path))
+            finish_ready()
+
+        for shortcode, files, mtime, refresh in jobs:
+            manifest.begin(shortcode, [name for _, name in files])
+            # Seeded in file order; downloads fill it in whatever order they finish
+            sizes, todo = {name: None for _, name in files}, []
+            for url, name in files:
+                path = os.path.join(folder, name)
+                recorded = manifest.recorded_size(shortcode, name)
+                if os.path.exists(path) and recorded in (None, os.path.getsize(path)):
+                    sizes[name] = os.path.getsize(path)
+                else:
+                    todo.append((url, name, path))
+            posts[shortcode] = {"left": len(todo), "sizes": sizes, "error": None, "mtime": mtime,
+                                "refresh": refresh, "fresh": None, "retried": set()}
+            if not todo:
+                finish_ready()
+                continue
+            for url, name, path in todo:
+                # Keep the queue short so manifest lines follow the downloads closely
+                while len(in_flight) >= 2 * DOWNLOAD_WORKERS:
+                    collect()
+                in_flight[fetchers.submit(fetch_file, session, url, path, mtime, gate)] = (shortcode, name, path)
+        while in_flight:
+            collect()
+        results = [future.result() for future in processing]
+    if results:
+        conn = cache_connect()
+        try:
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?)",
+                                 [(os.path.abspath(path), st.st_size, st.st_mtime_ns, sha)
+                                  for path, st, sha, _ in results])
+                conn.executemany("INSERT OR REPLACE INTO videos VALUES (?, ?)",
+                                 [(sha, json.dumps(info)) for path, _, sha, info in results
+                                  if path.lower().endswith(VIDEO_EXTENSIONS)])
+        finally:
+            conn.close()
+    return failed
+
 # ---------- Download media ----------
-def download_media(profile, username, login_user=None, login_pass=None):
+@traced
+def download_media(profile, username, login_user=None, login_pass=None, progress=None, ttl=None):
+    """
+    Download the profile picture and every spooled post into DOWNLOADS_DIR/<username>.
+    Without a profile object it is rebuilt from the cache, or re-fetched (feed included) if the
+    cached copy is older than ttl (default CACHE_TTL), so stale posts and URLs are not used.
+    Returns (ok, folder or error, {shortcode: error} of the posts that could not be fetched);
+    ok is False only when the download as a whole failed.
+    """
+    progress = progress or NULL_ACTIVITY
     target_folder = os.path.join(DOWNLOADS_DIR, username)
     os.makedirs(target_folder, exist_ok=True)
-    # Use instaloader to download profile into target folder
-    # We create a new Instaloader with dirname_pattern = target_folder
-    L = instaloader.Instaloader(dirname_pattern=target_folder, download_pictures=True, download_videos=True,
-                                save_metadata=False, post_metadata_txt_pattern="")
+    # Same logged-in context as the fetch; files are fetched by download_files, not Instaloader's options
+    L = create_instaloader_session(login_user, login_pass)
     try:
-        if login_user and login_pass:
-            try:
-                L.login(login_user, login_pass)
-            except Exception as e:
-                print(Fore.YELLOW + f"[!] Login failed for media download: {e}" + Style.RESET_ALL)
-        L.download_profile(profile, profile_pic_only=False)
-        return True, target_folder
+        if profile is None:
+            # Profile came from the cache; rebuild it from the stored structure while that is fresh
+            cached = cache_load(username, ttl=CACHE_TTL if ttl is None else ttl)
+            if cached and cached["structure"]:
+                profile = instaloader.load_structure(L.context, cached["structure"])
+            else:
+                ok, result, profile, _ = fetch_profile_cached(L, username, force_refresh=True)
+                if not ok:
+                    raise RuntimeError(result)
+        # Posts come from the spool written by fetch_profile, so the feed is not paged a second time
+        if not os.path.exists(spool_path(username)):
+            write_post_spool(profile, username)
+        with open(spool_path(username), encoding="utf-8") as f:
+            # the posts plus the profile picture
+            progress.set_total(sum(1 for _ in f) + 1)
+        manifest = DownloadManifest(target_folder)
+        synced = {"newest": None}
+
+        def jobs():
+            if manifest.is_complete(PROFILE_PIC_KEY):
+                progress.advance()
+            else:
+                pic_name = f"{username}_profile_pic.jpg"
+                yield PROFILE_PIC_KEY, [(profile.profile_pic_url, pic_name)], None, \
+                    lambda: [(instaloader.Profile.from_username(L.context, username).profile_pic_url, pic_name)]
+            for seen, record in enumerate(iter_spooled_posts(username), start=1):
+                shortcode = record["shortcode"]
+                if synced["newest"] is None and not record.get("is_pinned"):
+                    synced["newest"] = shortcode
+                if manifest.is_complete(shortcode):
+                    progress.advance()
+                    if shortcode == manifest.synced_through:
+                        # Everything older was completed by an earlier full run
+                        progress.set_total(seen + 1)
+                        return
+                    continue
+                post = instaloader.load_structure(L.context, record["structure"])
+                yield shortcode, post_media(post), post.date_utc, \
+                    lambda shortcode=shortcode: post_media(instaloader.Post.from_shortcode(L.context, shortcode))
+
+        session = media_session(L.context)
+        finished = False
+        try:
+            failed = download_files(session, jobs(), target_folder, manifest, progress)
+            # Only a run that got everything may let later runs stop early at its newest post
+            if synced["newest"] and not failed:
+                manifest.mark_synced(synced["newest"])
+            finished = True
+        finally:
+            session.close()
+            # After a full run only the final line per post matters; rewriting the journal drops
+            # the begin lines, whose order depends on how the concurrent downloads raced
+            manifest.close(compact=finished)
+            if replaying():
+                os.utime(manifest.path, (clock(), clock()))
+        # New files were hashed as they arrived, so this only stats them before deduplicating
+        store_in_cas(target_folder, hash_folder(target_folder))
+        return True, target_folder, failed
     except Exception as e:
-        return False, str(e)
+        return False, str(e), {}
+
+# ---------- Forensic hashing ----------
+HASH_WORKERS = min(8, os.cpu_count() or 1)
+HASH_CHUNK = 1024 * 1024
+
+def sha256_file(path):
+    """
+    SHA-256 of a file. Non-empty files are hashed through mmap in a single update, which
+    releases the GIL for the whole file, so pool threads really run in parallel.
+    """
+    with open(path, "rb") as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return hashlib.sha256(mm).hexdigest()
+        except (ValueError, OSError):
+            # empty file or mmap unavailable: plain chunked reads
+            digest = hashlib.sha256()
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                digest.update(chunk)
+            return digest.hexdigest()
+
+def media_files(folder):
+    """
+    Evidence files under folder (relative path -> absolute path), skipping our own dotfiles
+    and partial downloads.
+    """
+    files = {}
+    for root, dirs, names in os.walk(folder):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in names:
+            if name.startswith(".") or name.endswith(".part"):
+                continue
+            path = os.path.abspath(os.path.join(root, name))
+            files[os.path.relpath(path, os.path.abspath(folder)).replace(os.sep, "/")] = path
+    return files
+
+@traced
+def hash_folder(folder, progress=None):
+    """
+    SHA-256 of every file under folder as {relative path: hex digest}. The persistent index
+    in the cache DB is keyed by path, size and mtime, so unchanged files are never re-read;
+    the rest are hashed on a thread pool.
+    """
+    progress = progress or NULL_ACTIVITY
+    if not os.path.isdir(folder):
+        return {}
+    files = media_files(folder)
+    prefix = os.path.abspath(folder) + os.sep
+    conn = cache_connect()
+    try:
+        # Range scan over the primary key instead of one query per file
+        known = {path: (size, mtime_ns, sha) for path, size, mtime_ns, sha in conn.execute(
+            "SELECT path, size, mtime_ns, sha256 FROM file_hashes WHERE path >= ? AND path < ?",
+            (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)))}
+        hashes, todo = {}, []
+        for rel, path in files.items():
+            st = os.stat(path)
+            entry = known.get(path)
+            if entry and entry[:2] == (st.st_size, st.st_mtime_ns):
+                hashes[rel] = entry[2]
+            else:
+                todo.append((rel, path, st))
+        progress.set_total(len(files))
+        progress.advance(len(hashes))
+        if todo:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(HASH_WORKERS) as pool:
+                for (rel, path, st), sha in zip(todo, pool.map(sha256_file, [t[1] for t in todo])):
+                    hashes[rel] = sha
+                    progress.advance()
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?)",
+                                 [(path, st.st_size, st.st_mtime_ns, hashes[rel]) for rel, path, st in todo])
+        return dict(sorted(hashes.items()))
+    finally:
+        conn.close()
+
+@traced
+def store_in_cas(folder, hashes):
+    """
+    Deduplicate folder into the content-addressed store: the first copy of each digest is
+    hardlinked in as CAS_DIR/<aa>/<sha256>, later identical files are replaced by hardlinks
+    to that object. Returns the number of files deduplicated. Filesystems without hardlinks
+    are left untouched.
+    """
+    deduped = 0
+    relinked = []
+    for rel, sha in hashes.items():
+        path = os.path.join(folder, rel)
+        obj = os.path.join(CAS_DIR, sha[:2], sha)
+        try:
+            if not os.path.exists(obj):
+                os.makedirs(os.path.dirname(obj), exist_ok=True)
+                os.link(path, obj)
+            elif not os.path.samefile(path, obj):
+                tmp_path = path + ".cas-tmp"
+                os.link(obj, tmp_path)
+                os.replace(tmp_path, path)
+                relinked.append(os.path.abspath(path))
+                deduped += 1
+        except OSError:
+            continue
+    if relinked:
+        # The new link carries the stored object's mtime; keep the hash index in step
+        conn = cache_connect()
+        try:
+            with conn:
+                for path in relinked:
+                    st = os.stat(path)
+                    conn.execute("UPDATE file_hashes SET size = ?, mtime_ns = ? WHERE path = ?",
+                                 (st.st_size, st.st_mtime_ns, path))
+        finally:
+            conn.close()
+    return deduped
+
+# ---------- Video metadata ----------
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".m4v")
+# MP4 times count seconds from 1904-01-01
+MP4_EPOCH_OFFSET = 2082844800
+MP4_CONTAINERS = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+def _mp4_boxes(buf, start, end):
+    """
+    (type, payload start, box end) for each box in buf[start:end]; stops at a truncated box.
+    """
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", buf, pos)
+        header = 8
+        if size == 1:
+            if pos + 16 > end:
+                return
+            size, header = struct.unpack_from(">Q", buf, pos + 8)[0], 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            return
+        yield kind, pos + header, pos + size
+        pos += size
+
+def _mp4_track(buf, start, end, info):
+    handler = codec = None
+    width = height = 0
+    stack = [(start, end)]
+    while stack:
+        for kind, box_start, box_end in _mp4_boxes(buf, *stack.pop()):
+            if kind == b"tkhd" and box_end - box_start >= 84:
+                # width and height close the box, as 16.16 fixed point
+                width, height = (v >> 16 for v in struct.unpack_from(">II", buf, box_end - 8))
+            elif kind == b"hdlr" and box_end - box_start >= 12:
+                handler = bytes(buf[box_start + 8:box_start + 12])
+            elif kind == b"stsd" and box_end - box_start >= 16:
+                # version/flags, entry count, then the first sample entry's size and format
+                codec = bytes(buf[box_start + 12:box_start + 16]).decode("latin-1").strip()
+            elif kind in MP4_CONTAINERS:
+                stack.append((box_start, box_end))
+    if handler == b"vide" and not info["video_codec"]:
+        info.update(video_codec=codec, width=width or None, height=height or None)
+    elif handler == b"soun" and not info["audio_codec"]:
+        info["audio_codec"] = codec
+
+def mp4_info(path):
+    """
+    Duration, resolution, codecs and creation time of an MP4/MOV read from its moov box alone.
+    The file is mmapped and only the box headers and moov are touched, so the frames in mdat
+    are never read or decoded. Returns None when there is no readable moov.
+    """
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            moov = next(((s, e) for kind, s, e in _mp4_boxes(mm, 0, len(mm)) if kind == b"moov"), None)
+            if moov is None:
+                return None
+            info = {"duration_s": None, "width": None, "height": None,
+                    "video_codec": None, "audio_codec": None, "created_utc": None}
+            for kind, start, end in _mp4_boxes(mm, *moov):
+                if kind == b"mvhd" and end > start:
+                    # version 1 widens the times and duration to 64 bits: 32 bytes up to the duration, not 20
+                    version = mm[start]
+                    if end - start < (32 if version == 1 else 20):
+                        continue
+                    if version == 1:
+                        created, _, timescale, duration = struct.unpack_from(">QQIQ", mm, start + 4)
+                    else:
+                        created, _, timescale, duration = struct.unpack_from(">IIII", mm, start + 4)
+                    if timescale:
+                        info["duration_s"] = round(duration / timescale, 3)
+                    if created > MP4_EPOCH_OFFSET:
+                        info["created_utc"] = time.strftime("%Y-%m-%dT%H:%M:%SZ",
+                                                            time.gmtime(created - MP4_EPOCH_OFFSET))
+                elif kind == b"trak":
+                    _mp4_track(mm, start, end, info)
+            return info
+    except (OSError, ValueError, struct.error):
+        return None
+
+@traced
+def video_metadata(folder, hashes):
+    """
+    mp4_info() for every video in hashes (as returned by hash_folder) as {relative path: info}.
+    Results are cached in the videos table by content SHA-256, so a file is parsed once no
+    matter how often it is renamed or re-downloaded; misses are parsed on a thread pool.
+    """
+    videos = {rel: sha for rel, sha in hashes.items() if rel.lower().endswith(VIDEO_EXTENSIONS)}
+    if not videos:
+        return {}
+    conn = cache_connect()
+    try:
+        known = {}
+        shas = sorted(set(videos.values()))
+        for i in range(0, len(shas), 500):
+            chunk = shas[i:i + 500]
+            known.update((sha, json.loads(info)) for sha, info in conn.execute(
+                f"SELECT sha256, info FROM videos WHERE sha256 IN ({','.join('?' * len(chunk))})", chunk))
+        todo = {sha: rel for rel, sha in videos.items() if sha not in known}
+        if todo:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(HASH_WORKERS) as pool:
+                parsed = pool.map(mp4_info, [os.path.join(folder, rel) for rel in todo.values()])
+                known.update(zip(todo, parsed))
+            count("videos.parsed", len(todo))
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO videos VALUES (?, ?)",
+                                 [(sha, json.dumps(known[sha])) for sha in todo])
+        return {rel: known[sha] for rel, sha in sorted(videos.items())}
+    finally:
+        conn.close()
+
+def format_duration(seconds):
+    if seconds is None:
+        return "?"
+    seconds = int(round(seconds))
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}" if seconds >= 3600 \
+        else f"{seconds // 60}:{seconds % 60:02d}"
+
+def video_summary_lines(videos):
+    """
+    Report lines for the downloaded videos: a total, then one line per file.
+    """
+    total = sum(info["duration_s"] or 0 for info in videos.values() if info)
+    lines = [f"DOWNLOADED REELS ({len(videos)} files, {format_duration(total)} total)"]
+    for rel, info in videos.items():
+        if not info:
+            lines.append(f"{rel}  (no readable MP4 metadata)")
+            continue
+        size = f"{info['width']}x{info['height']}" if info["width"] else "?"
+        codecs = "+".join(c for c in (info["video_codec"], info["audio_codec"]) if c) or "?"
+        created = (info["created_utc"] or "").replace("T", " ").rstrip("Z")
+        lines.append(f"{rel}  {format_duration(info['duration_s'])}  {size}  {codecs}  {created}".rstrip())
+    return lines
+
+# ---------- Near-duplicate images ----------
+# dHash: the picture shrunk to 9x8 grey pixels, one bit per pair of horizontal neighbours (is the
+# right one brighter). Reposts, crops and re-encodes end up a few bits apart, where their SHA-256
+# digests have nothing in common.
+DHASH_INDEX = os.path.join(CACHE_DIR, "dhash.npz")
+# Largest Hamming distance (of 64 bits) at which two images count as the same picture
+NEAR_DUP_DISTANCE = int(os.environ.get("IG_OSINT_NEAR_DUP_DISTANCE", 10))
+# The distance matrix is computed in tiles of ROWS x COLS pairs (about 10 MB of buffers per worker)
+NEAR_DUP_ROWS = 256
+NEAR_DUP_COLS = 4096
+# ZIP member listing the files a collapsed archive left out
+NEAR_DUP_MEMBER = "NEAR_DUPLICATES.txt"
+
+def dhash_image(path):
+    """64-bit dHash of an image file, or None if it cannot be decoded."""
+    try:
+        import numpy as np
+        from PIL import Image
+        with Image.open(path) as img:
+            # JPEG draft mode decodes straight to a fraction of the size
+            img.draft("L", (64, 64))
+            small = img.convert("L").resize((9, 8), Image.BILINEAR)
+        pixels = np.asarray(small, dtype=np.int16)
+        return int(np.packbits(pixels[:, 1:] > pixels[:, :-1]).view(">u8")[0])
+    except Exception:
+        return None
+
+def dhash_index_load():
+    """
+    {sha256: dhash} from DHASH_INDEX: an (n, 32) uint8 array of raw digests next to an (n,)
+    uint64 array of hashes. A missing or unreadable index is empty.
+    """
+    import numpy as np
+    try:
+        with np.load(DHASH_INDEX) as index:
+            digests, hashes = index["sha256"].tobytes(), index["dhash"].tolist()
+    except (OSError, ValueError, KeyError):
+        return {}
+    return {digests[i * 32:(i + 1) * 32].hex(): h for i, h in enumerate(hashes)}
+
+def dhash_index_store(known):
+    import numpy as np
+    shas = sorted(known)
+    ensure_dir(CACHE_DIR)
+    # np.savez adds .npz to names without it
+    tmp_path = f"{DHASH_INDEX}.{os.getpid()}.tmp.npz"
+    digests = np.frombuffer(b"".join(bytes.fromhex(sha) for sha in shas), dtype=np.uint8).reshape(-1, 32)
+    np.savez(tmp_path, sha256=digests, dhash=np.array([known[sha] for sha in shas], dtype=np.uint64))
+    os.replace(tmp_path, DHASH_INDEX)
+
+def _popcount64(x, out):
+    import numpy as np
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(x, out=out)
+    # NumPy < 2.0: count through a per-byte table
+    table = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+    out[...] = table[x.view(np.uint8)].reshape(x.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+    return out
+
+def _near_pairs_strip(hashes, start, max_distance):
+    """
+    Pairs (i, j), j > i, within max_distance for the rows start..start + NEAR_DUP_ROWS, walking
+    the columns right of the diagonal one tile at a time through reused buffers.
+    """
+    import numpy as np
+    rows = hashes[start:start + NEAR_DUP_ROWS, None]
+    xor = np.empty((len(rows), NEAR_DUP_COLS), dtype=np.uint64)
+    bits = np.empty(xor.shape, dtype=np.uint8)
+    close = np.empty(xor.shape, dtype=bool)
+    found = []
+    for j in range(start, len(hashes), NEAR_DUP_COLS):
+        cols = hashes[None, j:j + NEAR_DUP_COLS]
+        width = cols.shape[1]
+        np.bitwise_xor(rows, cols, out=xor[:, :width])
+        _popcount64(xor[:, :width], bits[:, :width])
+        tile = np.less_equal(bits[:, :width], max_distance, out=close[:, :width])
+        if tile.any():
+            a, b = np.nonzero(tile)
+            a, b = a + start, b + j
+            keep = a < b
+            found.append(np.stack([a[keep], b[keep]], axis=1))
+    return found
+
+def near_pairs(hashes, max_distance):
+    """
+    (i, j) index pairs, i < j, of a uint64 array of dHashes at most max_distance bits apart.
+    The upper triangle of the distance matrix is XORed and popcounted tile by tile, so memory
+    stays bounded and no Python code runs per pair; NumPy releases the GIL, so strips of rows
+    run in parallel on the hash workers.
+    """
+    import numpy as np
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(HASH_WORKERS) as pool:
+        strips = pool.map(lambda start: _near_pairs_strip(hashes, start, max_distance),
+                          range(0, len(hashes), NEAR_DUP_ROWS))
+        found = [pairs for strip in strips for pairs in strip]
+    return np.concatenate([np.empty((0, 2), dtype=np.intp)] + found)
+
+@traced
+def near_duplicate_groups(folder, hashes, max_distance=NEAR_DUP_DISTANCE):
+    """
+    Images in hashes (as returned by hash_folder) whose dHashes are within max_distance bits
+    of each other, joined transitively, as lists of relative paths with the largest file (the
+    likeliest original) first. dHashes are cached by content SHA-256 in DHASH_INDEX; misses
+    are computed on a thread pool.
+    """
+    images = {rel: sha for rel, sha in hashes.items() if rel.lower().endswith(GALLERY_EXTENSIONS)}
+    if len(images) < 2:
+        return []
+    try:
+        import numpy as np
+    except ImportError:
+        return []
+    known = dhash_index_load()
+    todo = sorted({sha: rel for rel, sha in images.items() if sha not in known}.items())
+    if todo:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(HASH_WORKERS) as pool:
+            computed = pool.map(dhash_image, [os.path.join(folder, rel) for _, rel in todo])
+            known.update((sha, h) for (sha, _), h in zip(todo, computed) if h is not None)
+        count("images.dhashed", len(todo))
+        dhash_index_store(known)
+
+    rels = [rel for rel in sorted(images) if images[rel] in known]
+    # Identical hashes (including byte-identical copies) are compared once
+    unique, owner = np.unique(np.array([known[images[rel]] for rel in rels], dtype=np.uint64),
+                              return_inverse=True)
+    parent = list(range(len(unique)))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in near_pairs(unique, max_distance).tolist():
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+    members = defaultdict(list)
+    for rel, u in zip(rels, owner.ravel().tolist()):
+        members[find(u)].append(rel)
+    groups = [sorted(group, key=lambda rel: (-os.path.getsize(os.path.join(folder, rel)), rel))
+              for group in members.values() if len(group) > 1]
+    return sorted(groups, key=lambda group: group[0])
+
+def collapsed_duplicates(folder, max_distance=NEAR_DUP_DISTANCE):
+    """
+    {left-out relative path: kept relative path} for the near-duplicate groups in folder.
+    Groups are joined transitively, so A ~ B ~ C can put C far from A; a file is only left out
+    when it is within max_distance of a file that is kept. Going largest first, each file is
+    either left out against the first such kept file or kept itself.
+    """
+    hashes = hash_folder(folder)
+    groups = near_duplicate_groups(folder, hashes, max_distance)
+    if not groups:
+        return {}
+    known = dhash_index_load()
+    leave_out = {}
+    for group in groups:
+        kept = []
+        for rel in group:
+            h = known[hashes[rel]]
+            match = next((k for k in kept if bin(h ^ known[hashes[k]]).count("1") <= max_distance), None)
+            if match is None:
+                kept.append(rel)
+            else:
+                leave_out[rel] = match
+    return leave_out
+
+def near_duplicate_lines(groups):
+    """Report lines for the near-duplicate groups: a total, then the kept file and its copies."""
+    lines = [f"NEAR-DUPLICATE IMAGES: {len(groups)} groups, {sum(len(g) for g in groups)} files "
+             f"(dHash distance <= {NEAR_DUP_DISTANCE})"]
+    for group in groups:
+        lines.append(f"  {group[0]}  ~  " + ", ".join(group[1:]))
+    return lines
 
 # ---------- Zip folder ----------
-def zip_folder(folder_path, out_base):
+# Already-compressed media is stored as-is; deflating it again only burns CPU
+STORED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic", ".mp4", ".mov", ".m4a", ".webm",
+                     ".zip", ".gz", ".xz", ".bz2", ".7z"}
+# Text members up to this size are deflated whole on the worker pool; larger ones are streamed.
+# At most 2 * ZIP_WORKERS of them are in flight, so memory stays at a few MB.
+ZIP_TEXT_LIMIT = 1024 * 1024
+ZIP_WORKERS = min(8, os.cpu_count() or 1)
+ZIP_CHUNK = 1024 * 1024
+# Same threshold as zipfile: sizes and offsets past it get ZIP64 fields
+ZIP64_LIMIT = (1 << 31) - 1
+CHECKSUM_MEMBER = "SHA256SUMS"
+
+def _archive_members(folder_path):
+    """
+    (path, arcname, ZipInfo) for every file under folder_path in a stable order, skipping
+    our own dotfiles (the download manifest changes on every run) and partial downloads,
+    the same files media_files() leaves out.
+    """
+    for root, dirs, files in os.walk(folder_path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if name.startswith(".") or name.endswith(".part"):
+                continue
+            path = os.path.join(root, name)
+            arcname = os.path.relpath(path, folder_path).replace(os.sep, "/")
+            yield path, arcname, zipfile.ZipInfo.from_file(path, arcname, strict_timestamps=False)
+
+def _dos_time(date_time):
+    # ZIP timestamps only have two-second resolution
+    return date_time[:5] + (date_time[5] // 2 * 2,)
+
+def _dos_datetime(date_time):
+    year, month, day, hour, minute, second = date_time
+    return (year - 1980) << 9 | month << 5 | day, hour << 11 | minute << 5 | second // 2
+
+def _deflate(raw):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    return compressor.compress(raw) + compressor.flush()
+
+def _deflate_member(path):
+    """
+    Worker: read a small member, deflate and hash it (zlib and hashlib release the GIL, so
+    these run in parallel). Returns (raw-deflate blob, crc32, size, sha256).
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    return _deflate(raw), zlib.crc32(raw), len(raw), hashlib.sha256(raw).hexdigest()
+
+def _central_directory(f):
+    """(offset, size, entry count) of the central directory of the ZIP archive open as f."""
+    f.seek(0, os.SEEK_END)
+    tail_start = max(0, f.tell() - 22 - 0xFFFF)
+    f.seek(tail_start)
+    tail = f.read()
+    end = tail.rfind(b"PK\x05\x06")
+    if end < 0:
+        raise zipfile.BadZipFile("No end of central directory record")
+    entries, size, offset = struct.unpack_from("<10xHII", tail, end)
+    if entries == 0xFFFF or 0xFFFFFFFF in (size, offset):
+        # the ZIP64 locator sits right before the end record and points at the ZIP64 end record
+        (end64,) = struct.unpack_from("<8xQ", tail, end - 20)
+        f.seek(end64)
+        entries, size, offset = struct.unpack("<32xQQQ", f.read(56))
+    return offset, size, entries
+
+class _ZipWriter:
+    """
+    Minimal ZIP writer for members deflated on the worker pool, which zipfile has no public
+    API for: local headers, the central directory and the end records are written here, with
+    ZIP64 fields where a size or offset needs them. directory / entries carry over the central
+    directory of an archive being appended to.
+    """
+    def __init__(self, f, directory=b"", entries=0):
+        self.f = f
+        self.directory = [directory]
+        self.entries = entries
+
+    @staticmethod
+    def _local_header(zinfo, method, crc, compressed, size, zip64):
+        name = zinfo.filename.encode("utf-8")
+        extra = b""
+        if zip64:
+            extra = struct.pack("<HHQQ", 1, 16, size, compressed)
+            compressed = size = 0xFFFFFFFF
+        dos_date, dos_time = _dos_datetime(zinfo.date_time)
+        return struct.pack("<4sHHHHHIIIHH", b"PK\x03\x04", 45 if zip64 else 20,
+                           0 if zinfo.filename.isascii() else 0x800, method, dos_time, dos_date,
+                           crc, compressed, size, len(name), len(extra)) + name + extra
+
+    def _add_entry(self, zinfo, method, crc, compressed, size, offset):
+        name = zinfo.filename.encode("utf-8")
+        wide = [value for value in (size, compressed, offset) if value > ZIP64_LIMIT]
+        extra = struct.pack(f"<HH{len(wide)}Q", 1, 8 * len(wide), *wide) if wide else b""
+        size, compressed, offset = (0xFFFFFFFF if v > ZIP64_LIMIT else v for v in (size, compressed, offset))
+        version = 45 if wide else 20
+        dos_date, dos_time = _dos_datetime(zinfo.date_time)
+        self.directory.append(struct.pack(
+            "<4sHHHHHHIIIHHHHHII", b"PK\x01\x02", zinfo.create_system << 8 | version, version,
+            0 if zinfo.filename.isascii() else 0x800, method, dos_time, dos_date, crc, compressed, size,
+            len(name), len(extra), 0, 0, 0, zinfo.external_attr or 0o600 << 16, offset) + name + extra)
+        self.entries += 1
+
+    def add(self, zinfo, blob, crc, size, method=zipfile.ZIP_DEFLATED):
+        """Write a member whose data (deflated, or raw when stored) is already in memory."""
+        offset = self.f.tell()
+        self.f.write(self._local_header(zinfo, method, crc, len(blob), size,
+                                        max(size, len(blob)) > ZIP64_LIMIT))
+        self.f.write(blob)
+        self._add_entry(zinfo, method, crc, len(blob), size, offset)
+
+    def add_bytes(self, zinfo, data):
+        data = data.encode("utf-8") if isinstance(data, str) else data
+        self.add(zinfo, _deflate(data), zlib.crc32(data), len(data))
+
+    def add_file(self, zinfo, path, method, progress):
+        """
+        Copy a member into the archive in fixed-size chunks (deflating them if asked), hashing
+        it on the way through; the local header is filled in afterwards. Returns the sha256.
+        """
+        offset = self.f.tell()
+        # Same guess as zipfile: whether ZIP64 is needed has to be settled before the data
+        zip64 = zinfo.file_size * 1.05 > ZIP64_LIMIT
+        self.f.write(self._local_header(zinfo, method, 0, 0, 0, zip64))
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15) if method == zipfile.ZIP_DEFLATED else None
+        digest = hashlib.sha256()
+        crc = size = compressed = 0
+        with open(path, "rb") as src:
+            for chunk in iter(lambda: src.read(ZIP_CHUNK), b""):
+                crc = zlib.crc32(chunk, crc)
+                size += len(chunk)
+                digest.update(chunk)
+                out = compressor.compress(chunk) if compressor else chunk
+                self.f.write(out)
+                compressed += len(out)
+                progress.advance(len(chunk))
+        if compressor:
+            out = compressor.flush()
+            self.f.write(out)
+            compressed += len(out)
+        if not zip64 and max(size, compressed) > ZIP64_LIMIT:
+            raise RuntimeError(f"{zinfo.filename} grew past the ZIP64 limit while it was archived")
+        end = self.f.tell()
+        self.f.seek(offset)
+        self.f.write(self._local_header(zinfo, method, crc, compressed, size, zip64))
+        self.f.seek(end)
+        self._add_entry(zinfo, method, crc, compressed, size, offset)
+        return digest.hexdigest()
+
+    def close(self):
+        start = self.f.tell()
+        for record in self.directory:
+            self.f.write(record)
+        size = self.f.tell() - start
+        if self.entries >= 0xFFFF or max(start, size) > ZIP64_LIMIT:
+            end64 = self.f.tell()
+            self.f.write(struct.pack("<4sQHHIIQQQQ", b"PK\x06\x06", 44, 45, 45, 0, 0,
+                                     self.entries, self.entries, size, start))
+            self.f.write(struct.pack("<4sIQI", b"PK\x06\x07", 0, end64, 1))
+        entries = min(self.entries, 0xFFFF)
+        size, start = (0xFFFFFFFF if v > ZIP64_LIMIT else v for v in (size, start))
+        self.f.write(struct.pack("<4sHHHHIIH", b"PK\x05\x06", 0, 0, entries, entries, size, start, 0))
+
+@traced
+def zip_folder(folder_path, out_base, progress=None, leave_out=None):
+    """
+    Write <out_base>.zip from folder_path. Media is stored, other members are deflated (small
+    ones in parallel), and a SHA256SUMS member is written in the same pass. If the archive
+    already exists and none of its members changed, only the new files are appended, with
+    their checksums in a new SHA256SUMS.<n> member. Either way the archive is written to a
+    .tmp copy and swapped in whole, so an interrupted run leaves the old one intact. leave_out ({relative path: kept relative
+    path}, see collapsed_duplicates) drops files and lists them in a NEAR_DUPLICATES.txt member.
+    """
+    progress = progress or NULL_ACTIVITY
+    archive = out_base + ".zip"
+    leave_out = leave_out or {}
+    listing = None
+    if leave_out:
+        listing = f"# left out  ~  kept (dHash distance <= {NEAR_DUP_DISTANCE})\n" + \
+            "".join(f"{rel}  ~  {kept}\n" for rel, kept in sorted(leave_out.items()))
     try:
-        archive = shutil.make_archive(out_base, 'zip', folder_path)
+        ensure_dir(os.path.dirname(archive))
+        members = [m for m in _archive_members(folder_path) if m[1] not in leave_out]
+        existing, existing_listing = {}, None
+        if os.path.exists(archive):
+            try:
+                with zipfile.ZipFile(archive) as zf:
+                    existing = {i.filename: i for i in zf.infolist()}
+                    if NEAR_DUP_MEMBER in existing:
+                        existing_listing = zf.read(NEAR_DUP_MEMBER).decode("utf-8")
+            except zipfile.BadZipFile:
+                existing = {}
+        # Collapsing on or off, or a different set of duplicates, means a different archive
+        changed = existing_listing != listing or any(
+            arcname in existing and (existing[arcname].file_size != zinfo.file_size or
+                                     _dos_time(existing[arcname].date_time) != _dos_time(zinfo.date_time))
+            for _, arcname, zinfo in members)
+        if existing and not changed:
+            todo = [m for m in members if m[1] not in existing]
+            if not todo:
+                return True, archive
+            appending = True
+            size_before = os.path.getsize(archive)
+            sums_name = f"{CHECKSUM_MEMBER}.{1 + sum(1 for n in existing if n.startswith(CHECKSUM_MEMBER))}"
+        else:
+            todo = members
+            appending, size_before = False, 0
+            sums_name = CHECKSUM_MEMBER
+
+        from concurrent.futures import ThreadPoolExecutor
+        progress.set_total(sum(zinfo.file_size for _, _, zinfo in todo))
+        sums = []
+        target = archive + ".tmp"
+        if appending:
+            # The copy keeps every member already written; only its central directory is redone
+            shutil.copyfile(archive, target)
+        with open(target, "r+b" if appending else "wb") as f, ThreadPoolExecutor(ZIP_WORKERS) as pool:
+            if appending:
+                offset, size, entries = _central_directory(f)
+                f.seek(offset)
+                writer = _ZipWriter(f, f.read(size), entries)
+                f.seek(offset)
+                f.truncate()
+            else:
+                writer = _ZipWriter(f)
+            pending = deque()
+
+            def write_oldest():
+                zinfo, future = pending.popleft()
+                blob, crc, size, sha = future.result()
+                writer.add(zinfo, blob, crc, size)
+                sums.append((sha, zinfo.filename))
+                progress.advance(size)
+
+            for path, arcname, zinfo in todo:
+                ext = os.path.splitext(arcname)[1].lower()
+                if ext not in STORED_EXTENSIONS and zinfo.file_size <= ZIP_TEXT_LIMIT:
+                    pending.append((zinfo, pool.submit(_deflate_member, path)))
+                    # bound memory: only a couple of compressed members per worker in flight
+                    if len(pending) >= 2 * ZIP_WORKERS:
+                        write_oldest()
+                    continue
+                method = zipfile.ZIP_STORED if ext in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+                sums.append((writer.add_file(zinfo, path, method, progress), arcname))
+            while pending:
+                write_oldest()
+            writer.add_bytes(zipfile.ZipInfo(sums_name, time.localtime(clock())[:6]),
+                             "".join(f"{sha}  {name}\n" for sha, name in sums))
+            if listing and not appending:
+                writer.add_bytes(zipfile.ZipInfo(NEAR_DUP_MEMBER, time.localtime(clock())[:6]), listing)
+            writer.close()
+        os.replace(target, archive)
+        count("files.written")
+        count("bytes.written", os.path.getsize(archive) - size_before)
         return True, archive
     except Exception as e:
+        if os.path.exists(archive + ".tmp"):
+            os.remove(archive + ".tmp")
         return False, str(e)
 
 # ---------- HIBP breach check (optional) ----------
+HIBP_ATTEMPTS = 3
+# Longest Retry-After we are willing to sit out before giving up on a lookup
+HIBP_MAX_WAIT = 30
+# One pooled session (keep-alive across lookups), the background worker, and the earliest time
+# the service's last 429 lets us call it again
+HIBP = {"session": None, "executor": None, "not_before": 0.0}
+_HIBP_LOCK = threading.Lock()
+
+def hibp_session():
+    with _HIBP_LOCK:
+        if HIBP["session"] is None:
+            session = requests.Session()
+            session.headers["user-agent"] = "IG-OSINT-CLI"
+            HIBP["session"] = session
+        return HIBP["session"]
+
+def breach_cache_load(account, ttl=HIBP_TTL):
+    if not os.path.exists(CACHE_DB):
+        return None
+    conn = cache_connect()
+    try:
+        row = conn.execute("SELECT checked_at, status FROM breaches WHERE account = ?", (account.lower(),)).fetchone()
+    finally:
+        conn.close()
+    if row is None or time.time() - row[0] > ttl:
+        return None
+    return row[1]
+
+def breach_cache_store(account, status):
+    conn = cache_connect()
+    try:
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO breaches (account, checked_at, status) VALUES (?, ?, ?)",
+                         (account.lower(), time.time(), status))
+    finally:
+        conn.close()
+
+@traced
 def hibp_breach_check(account, api_key=None):
     """
     If api_key provided, calls HIBP 'Breached Account' or 'Account' endpoints.
     Otherwise returns a placeholder text.
+    Answers (breaches found or a 404 "no breach") are cached for HIBP_TTL; a 429 is retried
+    after the Retry-After the service asks for.
     """
-    # show a heartbeat animation if user provided a real api_key (visual only)
-    if api_key:
-        heartbeat("Querying breach DB")
     if not api_key:
         return "Not checked (provide HIBP API key in menu to enable)"
     try:
+        cached = breach_cache_load(account)
+        if cached is not None:
+            count("hibp.cache_hits")
+            return cached
         # HIBP API v3: https://haveibeenpwned.com/API/v3
         # Example: https://haveibeenpwned.com/api/v3/breachedaccount/{account}
-        headers = {"hibp-api-key": api_key, "user-agent": "IG-OSINT-CLI"}
+        headers = {"hibp-api-key": api_key}
         url = f"https://haveibeenpwned.com/api/v3/breachedaccount/{account}"
-        r = requests.get(url, headers=headers, timeout=12)
+        for attempt in range(HIBP_ATTEMPTS):
+            wait = HIBP["not_before"] - time.time()
+            if wait > 0:
+                count("sleep.retry_after_s", wait)
+                time.sleep(wait)
+            r = hibp_session().get(url, headers=headers, timeout=12)
+            if r.status_code != 429:
+                break
+            try:
+                retry_after = float(r.headers.get("retry-after", 2))
+            except ValueError:
+                retry_after = 2.0
+            if retry_after > HIBP_MAX_WAIT or attempt == HIBP_ATTEMPTS - 1:
+                return f"HIBP check error: rate limited (retry after {retry_after:.0f}s)"
+            HIBP["not_before"] = max(HIBP["not_before"], time.time() + retry_after)
         if r.status_code == 200:
             breaches = r.json()
-            return f"Breached in {len(breaches)} breach(es): " + ", ".join([b.get("Name") for b in breaches])
+            status = f"Breached in {len(breaches)} breach(es): " + ", ".join([b.get("Name") for b in breaches])
         elif r.status_code == 404:
-            return "No breach found"
+            status = "No breach found"
         else:
             return f"HIBP check error: HTTP {r.status_code}"
+        breach_cache_store(account, status)
+        return status
     except Exception as e:
         return f"HIBP check failed: {e}"
 
+def start_breach_check(account, api_key=None):
+    """
+    Run hibp_breach_check in the background and return its Future, so the lookup overlaps
+    with whatever comes next. Without a key (or with a cached answer) the status is returned
+    directly. Pass the result on as BreachStatus; breach_status() waits for it.
+    """
+    if not api_key:
+        return hibp_breach_check(account, api_key)
+    cached = breach_cache_load(account)
+    if cached is not None:
+        count("hibp.cache_hits")
+        return cached
+    with _HIBP_LOCK:
+        if HIBP["executor"] is None:
+            from concurrent.futures import ThreadPoolExecutor
+            HIBP["executor"] = ThreadPoolExecutor(2, thread_name_prefix="hibp")
+        return HIBP["executor"].submit(hibp_breach_check, account, api_key)
+
+def breach_status(value):
+    """
+    BreachStatus as text, waiting for the background lookup if it is still running.
+    """
+    return value.result() if hasattr(value, "result") else value
+
+# ---------- Font registry ----------
+FONT_CACHE_DIR = os.path.join(CACHE_DIR, "fonts")
+FONT_RESOLVED_FILE = os.path.join(FONT_CACHE_DIR, "resolved.json")
+TTF_MAGIC = (b"\x00\x01\x00\x00", b"true", b"OTTO", b"ttcf")
+# Plain TTFFont metrics kept in the cache; the maps (cw, cmap, glyph_ids), the descriptor and
+# ttffile are stored next to these. A cache file missing any of them is ignored.
+FONT_METRIC_FIELDS = ("type", "name", "scale", "sp", "ss", "up", "ut", "palette_index", "is_compressed",
+                      "is_cff", "is_cid_keyed", "is_symbol", "cff_ros", "collection_font_number")
+FONT_DESCRIPTOR_FIELDS = ("ascent", "descent", "cap_height", "flags", "font_b_box", "italic_angle",
+                          "stem_v", "missing_width")
+# parsed metrics already loaded in this process, keyed by (path, mtime_ns)
+_FONT_METRICS = {}
+
+def _font_stamp(path):
+    return os.stat(path).st_mtime_ns
+
+def resolve_font(key, search):
+    """
+    Resolve a font path once and remember it in FONT_RESOLVED_FILE, together with the file's
+    mtime; later calls just re-check that stamp. search() is only run (and the TTF header
+    validated) when nothing valid is remembered. Returns the path or None.
+    """
+    try:
+        with open(FONT_RESOLVED_FILE, encoding="utf-8") as f:
+            resolved = json.load(f)
+    except (OSError, ValueError):
+        resolved = {}
+    entry = resolved.get(key)
+    if entry:
+        try:
+            if _font_stamp(entry["path"]) == entry["mtime_ns"]:
+                return entry["path"]
+        except OSError:
+            pass
+    path = search()
+    if not path:
+        return None
+    try:
+        with open(path, "rb") as f:
+            if f.read(4) not in TTF_MAGIC:
+                return None
+        resolved[key] = {"path": path, "mtime_ns": _font_stamp(path)}
+        os.makedirs(FONT_CACHE_DIR, exist_ok=True)
+        with open(FONT_RESOLVED_FILE + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(resolved, f, indent=2)
+        os.replace(FONT_RESOLVED_FILE + ".tmp", FONT_RESOLVED_FILE)
+    except OSError:
+        return None
+    return path
+
+def _font_metrics_path(path, stamp):
+    import fpdf
+    digest = hashlib.sha1(f"{os.path.abspath(path)}|{stamp}|{fpdf.FPDF_VERSION}".encode()).hexdigest()
+    return os.path.join(FONT_CACHE_DIR, f"{digest}.json")
+
+def _save_font_metrics(font, path, stamp):
+    """
+    Save the parsed, document-independent metrics of an fpdf2 TTFFont (widths, cmap, glyph ids,
+    descriptor...) as JSON. The fontTools object itself holds an open file and is not cached.
+    """
+    if getattr(font, "color_font", None) is not None or not isinstance(font.cw, defaultdict):
+        return
+    metrics = {name: getattr(font, name) for name in FONT_METRIC_FIELDS}
+    metrics["ttffile"] = str(font.ttffile)
+    metrics["desc"] = {name: getattr(font.desc, name) for name in FONT_DESCRIPTOR_FIELDS}
+    metrics["desc"]["flags"] = font.desc.flags.value
+    # JSON object keys are strings, so the per-codepoint maps are stored as [codepoint, value] pairs
+    for name in ("cw", "cmap", "glyph_ids"):
+        metrics[name] = list(getattr(font, name).items())
+    metrics["cw_default"] = font.cw.default_factory()
+    try:
+        blob = json.dumps(metrics, separators=(",", ":"))
+    except (TypeError, ValueError):
+        return
+    os.makedirs(FONT_CACHE_DIR, exist_ok=True)
+    cache_path = _font_metrics_path(path, stamp)
+    with open(cache_path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(blob)
+    os.replace(cache_path + ".tmp", cache_path)
+    _FONT_METRICS[(path, stamp)] = metrics
+
+def _load_font_metrics(path, stamp):
+    metrics = _FONT_METRICS.get((path, stamp))
+    if metrics is None:
+        try:
+            with open(_font_metrics_path(path, stamp), encoding="utf-8") as f:
+                metrics = json.load(f)
+        except (OSError, ValueError):
+            return None
+        expected = FONT_METRIC_FIELDS + ("ttffile", "desc", "cw", "cmap", "glyph_ids", "cw_default")
+        if not isinstance(metrics, dict) or any(name not in metrics for name in expected) \
+                or any(name not in metrics["desc"] for name in FONT_DESCRIPTOR_FIELDS):
+            return None
+        _FONT_METRICS[(path, stamp)] = metrics
+    return metrics
+
+def _font_from_metrics(pdf, fontkey, path, metrics):
+    from pathlib import Path
+    from fpdf.fonts import TTFFont, SubsetMap, TextEmphasis, PDFFontDescriptor
+    from fpdf.enums import FontDescriptorFlags
+    from fontTools import ttLib
+    font = TTFFont.__new__(TTFFont)
+    for name in FONT_METRIC_FIELDS:
+        setattr(font, name, metrics[name])
+    if font.cff_ros is not None:
+        font.cff_ros = tuple(font.cff_ros)
+    font.ttffile = Path(metrics["ttffile"])
+    desc = dict(metrics["desc"], flags=FontDescriptorFlags(metrics["desc"]["flags"]))
+    font.desc = PDFFontDescriptor(**{name: desc[name] for name in FONT_DESCRIPTOR_FIELDS})
+    default_width = metrics["cw_default"]
+    font.cw = defaultdict(lambda: default_width, ((int(c), w) for c, w in metrics["cw"]))
+    font.cmap = {int(c): glyph for c, glyph in metrics["cmap"]}
+    font.glyph_ids = {int(c): gid for c, gid in metrics["glyph_ids"]}
+    font.i = len(pdf.fonts) + 1
+    font.fontkey = fontkey
+    font.emphasis = TextEmphasis.coerce("")
+    font._hbfont = None
+    font.missing_glyphs = []
+    font.biggest_size_pt = 0
+    font.color_font = None
+    # Subsetting at output time modifies the fontTools object, so every document gets its own;
+    # a lazy open only reads the table directory.
+    font.ttfont = ttLib.TTFont(path, recalcTimestamp=False, fontNumber=0, lazy=True)
+    font.subset = SubsetMap(font)
+    return font
+
+def add_cached_font(pdf, family, path):
+    """
+    pdf.add_font() backed by the on-disk metrics cache (keyed by font path and mtime).
+    The first report parses the TTF and fills the cache; later ones, in this or any
+    other process, rebuild the font object from it. Any mismatch falls back to add_font().
+    """
+    fontkey = family.lower()
+    stamp = _font_stamp(path)
+    metrics = _load_font_metrics(path, stamp)
+    if metrics is not None:
+        try:
+            pdf.fonts[fontkey] = _font_from_metrics(pdf, fontkey, path, metrics)
+            return
+        except Exception:
+            pdf.fonts.pop(fontkey, None)
+    pdf.add_font(family, "", path)
+    try:
+        _save_font_metrics(pdf.fonts[fontkey], path, stamp)
+    except OSError:
+        pass
+
+def find_report_font():
+    """
+    DejaVuSansMono.ttf from the working directory (or next to this script).
+    """
+    def search():
+        for folder in (os.getcwd(), os.path.dirname(os.path.abspath(__file__))):
+            path = os.path.join(folder, "DejaVuSansMono.ttf")
+            if os.path.exists(path):
+                return path
+        return None
+    return resolve_font("report_mono", search)
+
 # ---------- PDF Generation (Unicode-safe) ----------
 def find_unicode_font():
     """
@@ -218,8 +2326,12 @@ def find_unicode_font():
     - Windows Arial Unicode MS
     - DejaVuSans in common linux paths
     - current folder DejaVuSans.ttf
-    Returns path or None.
+    Returns path or None. The result is remembered by the font registry, so the
+    /usr/share/fonts walk only ever happens once.
     """
+    return resolve_font("unicode", _search_unicode_font)
+
+def _search_unicode_font():
     candidates = [
         r"C:\Windows\Fonts\arialuni.ttf",
         r"C:\Windows\Fonts\ARIALUNI.TTF",
@@ -247,9 +2359,186 @@ def remove_emojis(text):
                                "]+", flags=re.UNICODE)
     return emoji_pattern.sub('', text)
 
-def generate_pdf_report(data_dict, username, pdf_path=None):
-    if pdf_path is None:
-        pdf_path = os.path.join(REPORTS_DIR, f"{username}_report.pdf")
+# ---------- Report images ----------
+THUMB_DIR = os.path.join(CACHE_DIR, "thumbs")
+# The profile photo is drawn 35 mm wide; 35 mm at 300 dpi
+PROFILE_THUMB_PX = 413
+
+def find_profile_pic(username):
+    """
+    The downloaded profile picture. download_media stores it under a fixed name, so this is a
+    direct lookup; only folders downloaded before the manifest existed fall back to a scan.
+    """
+    folder = os.path.join(DOWNLOADS_DIR, username)
+    path = os.path.join(folder, f"{username}_profile_pic.jpg")
+    if os.path.exists(path):
+        return path
+    if os.path.isdir(folder) and not os.path.exists(os.path.join(folder, MANIFEST_NAME)):
+        for file in os.listdir(folder):
+            if "profile" in file.lower() and file.lower().endswith((".jpg", ".jpeg", ".png")):
+                return os.path.join(folder, file)
+    return None
+
+def profile_thumbnail(path, sha=None):
+    """
+    Square JPEG thumbnail of path sized for the PDF, made once and cached under THUMB_DIR by
+    the source's SHA-256. Falls back to the original image if Pillow cannot process it.
+    """
+    sha = sha or sha256_file(path)
+    thumb_path = os.path.join(THUMB_DIR, f"{sha}_{PROFILE_THUMB_PX}.jpg")
+    if os.path.exists(thumb_path):
+        return thumb_path
+    try:
+        from PIL import Image, ImageOps
+        with Image.open(path) as img:
+            thumb = ImageOps.fit(img.convert("RGB"), (PROFILE_THUMB_PX, PROFILE_THUMB_PX), Image.LANCZOS)
+        os.makedirs(THUMB_DIR, exist_ok=True)
+        tmp_path = thumb_path + ".tmp"
+        thumb.save(tmp_path, "JPEG", quality=85, optimize=True)
+        os.replace(tmp_path, thumb_path)
+        return thumb_path
+    except Exception:
+        return path
+
+# ---------- Media contact sheets ----------
+# Gallery thumbnails: 5 x 6 per A4 page, 32 mm square cells, ~150 dpi
+GALLERY_THUMB_PX = 192
+GALLERY_COLUMNS = 5
+GALLERY_ROWS = 6
+GALLERY_WORKERS = min(8, os.cpu_count() or 1)
+# Below this many missing thumbnails a process pool costs more than it saves
+GALLERY_POOL_MIN = 8
+GALLERY_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+def gallery_items(username, hashes):
+    """
+    (path, sha) of every downloaded image except the profile picture, in file name order
+    (which is date order for Instaloader-style names).
+    """
+    folder = os.path.join(DOWNLOADS_DIR, username)
+    skip = f"{username}_profile_pic.jpg"
+    return [(os.path.join(folder, rel), sha) for rel, sha in hashes.items()
+            if rel.lower().endswith(GALLERY_EXTENSIONS) and rel != skip]
+
+def gallery_thumb_path(sha):
+    return os.path.join(THUMB_DIR, f"{sha}_{GALLERY_THUMB_PX}.jpg")
+
+def make_gallery_thumb(item):
+    """
+    Worker for the process pool: decode path at reduced size (JPEG draft mode decodes straight
+    to 1/2, 1/4 or 1/8 scale), pad it to a square and cache it. Returns the thumbnail path,
+    or None if the image could not be read.
+    """
+    path, sha = item
+    thumb_path = gallery_thumb_path(sha)
+    try:
+        from PIL import Image, ImageOps
+        with Image.open(path) as img:
+            img.draft("RGB", (GALLERY_THUMB_PX, GALLERY_THUMB_PX))
+            thumb = ImageOps.pad(img.convert("RGB"), (GALLERY_THUMB_PX, GALLERY_THUMB_PX),
+                                 Image.BILINEAR, color="white")
+        os.makedirs(THUMB_DIR, exist_ok=True)
+        tmp_path = f"{thumb_path}.{os.getpid()}.tmp"
+        thumb.save(tmp_path, "JPEG", quality=80)
+        os.replace(tmp_path, thumb_path)
+        return thumb_path
+    except Exception:
+        return None
+
+def iter_gallery_thumbs(items):
+    """
+    Yield the thumbnail path (or None) for each item, in order. Cached thumbnails are yielded
+    straight away; missing ones are made across a process pool and yielded as they finish,
+    so pages can be laid out while the rest are still decoding. The report renders in a
+    thread next to others, so the pool never forks: its workers come from a forkserver
+    (or are spawned), which does not copy locks other threads may be holding.
+    """
+    missing = [item for item in items if not os.path.exists(gallery_thumb_path(item[1]))]
+    pool = None
+    if len(missing) >= GALLERY_POOL_MIN and GALLERY_WORKERS > 1:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        try:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            pool = ProcessPoolExecutor(GALLERY_WORKERS, mp_context=multiprocessing.get_context(method))
+        except (OSError, NotImplementedError):
+            pool = None
+    if pool is None:
+        made = map(make_gallery_thumb, missing)
+    else:
+        made = pool.map(make_gallery_thumb, missing, chunksize=max(1, len(missing) // (GALLERY_WORKERS * 4)))
+    # missing keeps the order of items, so results line up with the items they belong to
+    todo = {sha for _, sha in missing}
+    try:
+        for _, sha in items:
+            yield next(made) if sha in todo else gallery_thumb_path(sha)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    count("thumbs.made", len(missing))
+
+@traced
+def add_contact_sheets(pdf, items, font_family):
+    """
+    Append the gallery to pdf, GALLERY_COLUMNS x GALLERY_ROWS thumbnails per page with the
+    file name under each. Only thumbnail paths reach FPDF (JPEGs are embedded as they are),
+    so memory grows with the small thumbnails, not with the decoded images.
+    """
+    per_page = GALLERY_COLUMNS * GALLERY_ROWS
+    pages = (len(items) + per_page - 1) // per_page
+    left, top, cell, gap, caption = 15, 25, 32, 4, 4
+    for i, ((path, _), thumb) in enumerate(zip(items, iter_gallery_thumbs(items))):
+        slot = i % per_page
+        if slot == 0:
+            pdf.add_page()
+            pdf.set_font(font_family, "", 9)
+            pdf.set_xy(left, 12)
+            pdf.cell(0, 6, f"MEDIA CONTACT SHEET  {i // per_page + 1}/{pages}  ({len(items)} images)")
+            pdf.set_font(font_family, "", 5)
+        x = left + (slot % GALLERY_COLUMNS) * (cell + gap)
+        y = top + (slot // GALLERY_COLUMNS) * (cell + gap + caption)
+        if thumb:
+            pdf.image(thumb, x=x, y=y, w=cell, h=cell)
+        pdf.set_xy(x, y + cell + 0.5)
+        pdf.cell(cell, 3, os.path.basename(path)[:30], align="C")
+
+# Bump when a renderer's output changes for the same inputs, so cached outputs are redone
+REPORT_FORMAT_VERSION = 1
+RENDER_INDEX_FILE = ".render_index.json"
+
+def atomic_write(path, data):
+    """
+    Write bytes to path via a temp file in the same folder and an atomic rename, so readers
+    never see a half-written report.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    count("files.written")
+    count("bytes.written", len(data))
+
+def fingerprint(*parts):
+    return hashlib.sha256(json.dumps([REPORT_FORMAT_VERSION, *parts], sort_keys=True, default=str,
+                                     ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def file_stamp(path):
+    if not path:
+        return None
+    st = os.stat(path)
+    return [path, st.st_size, st.st_mtime_ns]
+
+@traced
+def build_report_model(data_dict, username, gallery=False):
+    """
+    Everything the PDF / TXT / JSON renderers need, computed once from data_dict.
+    With gallery=True the PDF gets contact sheets of the downloaded images.
+    """
+    reels = data_dict.get("reels")
+    if reels is None:
+        # Counting failed during fetch; fall back to whatever the post spool holds
+        summary = spool_summary(username)
+        reels = summary["reels"] if summary else "Unknown"
 
     # ---------------------------
     # Table data
@@ -262,7 +2551,7 @@ def generate_pdf_report(data_dict, username, pdf_path=None):
         ["Followers", data_dict.get("followers", "")],
         ["Following", data_dict.get("following", "")],
         ["Total Posts", data_dict.get("total_posts", "")],
-        ["Reels (videos)", data_dict.get("reels", "Unknown")],
+        ["Reels (videos)", reels],
     ]
 
     # Calculate column width for stable monospace PDF rendering
@@ -289,10 +2578,54 @@ def generate_pdf_report(data_dict, username, pdf_path=None):
 
     full_report = f"INSTAGRAM OSINT REPORT\n\n" + "\n".join(table_lines) + "\n\n" + suggestion_text
 
+    # Chain-of-custody hashes of the downloaded media (served from the hash index when unchanged)
+    downloads_folder = os.path.join(DOWNLOADS_DIR, username)
+    media_hashes = hash_folder(downloads_folder)
+    videos = video_metadata(downloads_folder, media_hashes)
+    if videos:
+        full_report += "\n\n" + "\n".join(video_summary_lines(videos))
+    near_duplicates = near_duplicate_groups(downloads_folder, media_hashes)
+    if near_duplicates:
+        full_report += "\n\n" + "\n".join(near_duplicate_lines(near_duplicates))
+
+    # ---------------------------
+    # Profile photo (small thumbnail, not the full-resolution download)
+    # ---------------------------
+    profile_pic = find_profile_pic(username)
+    if profile_pic:
+        rel = os.path.relpath(profile_pic, downloads_folder).replace(os.sep, "/")
+        profile_pic = profile_thumbnail(profile_pic, media_hashes.get(rel))
+
+    txt = full_report
+    if media_hashes:
+        txt += "\n\nMEDIA SHA-256\n" + "".join(f"{sha}  {rel}\n" for rel, sha in media_hashes.items())
+    json_data = dict(data_dict, media_sha256=media_hashes) if media_hashes else data_dict
+    if videos:
+        json_data = dict(json_data, videos=videos)
+    if near_duplicates:
+        json_data = dict(json_data, near_duplicates=near_duplicates)
+
+    return {
+        "username": username,
+        "text": full_report,
+        "txt": txt,
+        "json": json_data,
+        "profile_pic": profile_pic,
+        "font": find_report_font(),
+        "gallery": gallery_items(username, media_hashes) if gallery else [],
+        # A replayed PDF is dated when the cassette was recorded, so every replay writes it identically
+        "created": clock() if replaying() else None,
+    }
+
+@traced
+def render_pdf(model, path):
     # ---------------------------
     # PDF Setup
     # ---------------------------
     pdf = FPDF()
+    if model["created"] is not None:
+        from datetime import datetime, timezone
+        pdf.set_creation_date(datetime.fromtimestamp(model["created"], timezone.utc))
     pdf.set_auto_page_break(auto=True, margin=20)
     pdf.add_page()
 
@@ -302,18 +2635,9 @@ def generate_pdf_report(data_dict, username, pdf_path=None):
     # ---------------------------
     # Insert Profile Photo
     # ---------------------------
-    profile_pic = None
-    downloads_folder = os.path.join(DOWNLOADS_DIR, username)
-
-    if os.path.isdir(downloads_folder):
-        for file in os.listdir(downloads_folder):
-            if "profile" in file.lower() and file.lower().endswith((".jpg", ".jpeg", ".png")):
-                profile_pic = os.path.join(downloads_folder, file)
-                break
-
-    if profile_pic:
+    if model["profile_pic"]:
         try:
-            pdf.image(profile_pic, x=left_margin, y=15, w=35, h=35)
+            pdf.image(model["profile_pic"], x=left_margin, y=15, w=35, h=35)
         except:
             pass
 
@@ -322,20 +2646,17 @@ def generate_pdf_report(data_dict, username, pdf_path=None):
     # ---------------------------
     # Use DejaVuSansMono (Adobe Compatible)
     # ---------------------------
-    font_path = os.path.join(os.getcwd(), "DejaVuSansMono.ttf")
+    font_path = model["font"]
 
-    if os.path.exists(font_path):
-        pdf.add_font("DVMono", "", font_path, uni=True)
+    if font_path:
+        add_cached_font(pdf, "DVMono", font_path)
         pdf.set_font("DVMono", "", 9)
-        safe_text = remove_emojis(full_report)
-        for line in safe_text.split("\n"):
-            pdf.multi_cell(safe_width, 5, line)
     else:
         # Hard fallback
         pdf.set_font("Courier", size=9)
-        safe_text = remove_emojis(full_report)
-        for line in safe_text.split("\n"):
-            pdf.multi_cell(safe_width, 5, line)
+    safe_text = remove_emojis(model["text"])
+    for line in safe_text.split("\n"):
+        pdf.multi_cell(safe_width, 5, line)
 
     # ---------------------------
     # Footer Branding
@@ -344,20 +2665,88 @@ def generate_pdf_report(data_dict, username, pdf_path=None):
     pdf.set_font("Courier", "I", 9)
     pdf.cell(0, 6, "Generated by CYBER-OPERATION-X", align="C")
 
-    pdf.output(pdf_path)
+    if model["gallery"]:
+        add_contact_sheets(pdf, model["gallery"], "DVMono" if font_path else "Courier")
 
-    # ---------------------------
-    # TXT + JSON Export
-    # ---------------------------
-    txt_path = os.path.join(REPORTS_DIR, f"{username}_report.txt")
-    with open(txt_path, "w", encoding="utf-8") as f:
-        f.write(full_report)
+    atomic_write(path, bytes(pdf.output()))
+
+@traced
+def render_txt(model, path):
+    atomic_write(path, model["txt"].encode("utf-8"))
 
-    json_path = os.path.join(REPORTS_DIR, f"{username}_report.json")
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(data_dict, f, indent=4, ensure_ascii=False)
+@traced
+def report_json(model):
+    """
+    The JSON report body. BreachStatus may still be a running lookup; this is the one place
+    that waits for it.
+    """
+    return {k: breach_status(v) if k == "BreachStatus" else v for k, v in model["json"].items()}
 
-    return True, pdf_path
+def render_json(model, path):
+    atomic_write(path, json.dumps(report_json(model), indent=4, ensure_ascii=False).encode("utf-8"))
+
+def pdf_inputs(model):
+    gallery = [GALLERY_THUMB_PX, [[os.path.basename(path), sha] for path, sha in model["gallery"]]]
+    return ["pdf", model["text"], file_stamp(model["profile_pic"]), file_stamp(model["font"]), gallery,
+            model["created"]]
+
+def txt_inputs(model):
+    return ["txt", model["txt"]]
+
+def json_inputs(model):
+    return ["json", report_json(model)]
+
+@traced
+def generate_pdf_report(data_dict, username, pdf_path=None, progress=None, gallery=False):
+    """
+    Build the report model once, then render PDF, TXT and JSON concurrently. A renderer is
+    skipped when the fingerprint of its inputs matches the one recorded for the existing
+    file in REPORTS_DIR/.render_index.json. Returns (ok, pdf_path).
+    """
+    progress = progress or NULL_ACTIVITY
+    progress.set_total(3)
+    if pdf_path is None:
+        pdf_path = os.path.join(REPORTS_DIR, f"{username}_report.pdf")
+    try:
+        ensure_dir(REPORTS_DIR)
+        ensure_dir(os.path.dirname(pdf_path))
+        model = build_report_model(data_dict, username, gallery=gallery)
+        # Inputs are fingerprinted inside each job: the JSON one may wait for the breach lookup
+        jobs = [
+            (render_pdf, pdf_path, pdf_inputs),
+            (render_txt, os.path.join(REPORTS_DIR, f"{username}_report.txt"), txt_inputs),
+            (render_json, os.path.join(REPORTS_DIR, f"{username}_report.json"), json_inputs),
+        ]
+
+        index_path = os.path.join(REPORTS_DIR, RENDER_INDEX_FILE)
+        try:
+            with open(index_path, encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+
+        def run(job):
+            renderer, path, inputs = job
+            key = os.path.abspath(path)
+            fp = fingerprint(inputs(model))
+            if index.get(key) == fp and os.path.exists(path):
+                return key, None
+            renderer(model, path)
+            return key, fp
+
+        from concurrent.futures import ThreadPoolExecutor
+        updates = {}
+        with ThreadPoolExecutor(len(jobs)) as pool:
+            for key, fp in pool.map(run, jobs):
+                if fp:
+                    updates[key] = fp
+                progress.advance()
+        if updates:
+            index.update(updates)
+            atomic_write(index_path, json.dumps(index, indent=2).encode("utf-8"))
+        return True, pdf_path
+    except Exception as e:
+        return False, str(e)
 
 
 # ---------- CLI Menu ----------
@@ -394,25 +2783,48 @@ STATE = {
     "last_profile_data": None,
     "last_profile_obj": None,
     "instaloader_login": {"user": None, "pass": None},
-    "hibp_api_key": None
+    "hibp_api_key": None,
+    # (username, api key, status or Future) of the breach lookup started after the last fetch
+    "breach_check": None
 }
 
+def pending_breach_check(username):
+    """
+    The breach lookup for username, started in the background if it is not already running.
+    """
+    pending = STATE['breach_check']
+    if not pending or pending[:2] != (username, STATE['hibp_api_key']):
+        pending = (username, STATE['hibp_api_key'], start_breach_check(username, STATE['hibp_api_key']))
+        STATE['breach_check'] = pending
+    return pending[2]
+
 def analyze_flow():
     url = input(Fore.BLUE + "🔗 Enter Instagram profile URL or username: " + Style.RESET_ALL).strip()
     username = extract_username(url)
     if not username:
         print(Fore.RED + "Invalid input." + Style.RESET_ALL)
         return
-    print("Fetching profile metadata...")
-    # Animated radar while fetching metadata (non-blocking to logic)
-    radar_scan(duration=3)
-    L = create_instaloader_session(STATE['instaloader_login']['user'], STATE['instaloader_login']['pass'])
-    ok, result, profile_obj = fetch_profile(L, username)
+    force_refresh = False
+    cached = cache_load(username, ttl=CACHE_TTL)
+    if cached:
+        answer = input(f"Cached copy from {format_age(cached['age'])} ago found. Force refresh from network? (y/N): ")
+        force_refresh = answer.strip().lower() == "y"
+    if cached and not force_refresh:
+        ok, result, profile_obj = True, cached["data"], None
+        print(Fore.GREEN + "Loaded profile metadata from cache." + Style.RESET_ALL)
+    else:
+        print("Fetching profile metadata...")
+        L = create_instaloader_session(STATE['instaloader_login']['user'], STATE['instaloader_login']['pass'])
+        # Radar animates while the fetch runs and reports posts seen
+        with radar_scan(unit="posts") as scan:
+            ok, result, profile_obj, _ = fetch_profile_cached(L, username, force_refresh=True, progress=scan)
     if not ok:
         print(Fore.RED + f"Failed to fetch profile: {result}" + Style.RESET_ALL)
         return
     STATE['last_profile_data'] = result
     STATE['last_profile_obj'] = profile_obj
+    # Breach lookup runs in the background until the report needs it
+    pending_breach_check(result["username"])
     # Present table
     table = [
         ["Username", result["username"]],
@@ -428,16 +2840,21 @@ def analyze_flow():
     print(Fore.GREEN + "\nProfile fetched and stored in session (use other menu options)." + Style.RESET_ALL)
 
 def download_flow():
-    if not STATE['last_profile_obj']:
+    if not STATE['last_profile_data']:
         print(Fore.RED + "No profile fetched. Run option 1 first." + Style.RESET_ALL)
         return
     username = STATE['last_profile_data']['username']
     print(Fore.BLUE + f"Downloading media for @{username} into {DOWNLOADS_DIR}/{username} ..." + Style.RESET_ALL)
-    # Show radar while starting download
-    radar_scan(duration=4)
-    ok, res = download_media(STATE['last_profile_obj'], username,
-                             STATE['instaloader_login']['user'], STATE['instaloader_login']['pass'])
-    if ok:
+    with progress_bar("Downloading media", unit="posts") as bar:
+        ok, res, failed = download_media(STATE['last_profile_obj'], username,
+                                         STATE['instaloader_login']['user'], STATE['instaloader_login']['pass'],
+                                         progress=bar)
+    if ok and failed:
+        print(Fore.YELLOW + f"Download finished with {len(failed)} failed posts (run it again to retry): {res}"
+              + Style.RESET_ALL)
+        for shortcode, error in failed.items():
+            print(Fore.YELLOW + f"  {shortcode}: {error}" + Style.RESET_ALL)
+    elif ok:
         print(Fore.GREEN + f"Download completed: {res}" + Style.RESET_ALL)
     else:
         print(Fore.RED + f"Download failed: {res}" + Style.RESET_ALL)
@@ -448,12 +2865,13 @@ def generate_pdf_flow():
         return
     username = STATE['last_profile_data']['username']
     data = STATE['last_profile_data'].copy()
-    # Add breach status if HIBP key present
-    data['BreachStatus'] = hibp_breach_check(username, STATE['hibp_api_key'])
-    # Short radar and progress indicator for PDF creation
-    radar_scan(duration=2)
-    progress_bar("Generating PDF report", duration=2)
-    ok, path = generate_pdf_report(data, username)
+    # Add breach status if HIBP key present (still running, only the JSON report waits for it)
+    data['BreachStatus'] = pending_breach_check(username)
+    gallery = False
+    if os.path.isdir(os.path.join(DOWNLOADS_DIR, username)):
+        gallery = input("Add contact sheets of the downloaded images to the PDF? (y/N): ").strip().lower() == "y"
+    with progress_bar("Generating PDF report", unit="files") as bar:
+        ok, path = generate_pdf_report(data, username, progress=bar, gallery=gallery)
     if ok:
         print(Fore.GREEN + f"PDF generated: {path}" + Style.RESET_ALL)
     else:
@@ -469,9 +2887,17 @@ def create_zip_flow():
         print(Fore.RED + f"No downloads found at: {folder}" + Style.RESET_ALL)
         return
     zip_base = os.path.join(DOWNLOADS_DIR, f"{username}_media")
-    ok, res = zip_folder(folder, zip_base)
+    leave_out = {}
+    if input("Leave out near-duplicate images (keeps the largest of each group)? (y/N): ").strip().lower() == "y":
+        with heartbeat("Comparing images"):
+            leave_out = collapsed_duplicates(folder)
+    with progress_bar("Creating ZIP archive", unit="bytes") as bar:
+        ok, res = zip_folder(folder, zip_base, progress=bar, leave_out=leave_out)
     if ok:
         print(Fore.GREEN + f"Created ZIP archive: {res}" + Style.RESET_ALL)
+        if leave_out:
+            print(Fore.YELLOW + f"{len(leave_out)} near-duplicate images left out (see {NEAR_DUP_MEMBER})"
+                  + Style.RESET_ALL)
     else:
         print(Fore.RED + f"ZIP creation failed: {res}" + Style.RESET_ALL)
 
@@ -479,17 +2905,18 @@ def set_instaloader_login():
     user = input("Enter Instaloader username (leave blank to clear): ").strip()
     if not user:
         STATE['instaloader_login'] = {"user": None, "pass": None}
+        clear_saved_session()
         print("Cleared stored login.")
         return
-    pwd = getpass.getpass("Enter password (input hidden): ")
-    STATE['instaloader_login'] = {"user": user, "pass": pwd}
-    # Test login
-    L = create_instaloader_session(user, pwd)
-    try:
-        L.check_login()
-        print(Fore.GREEN + "Login appears successful (or at least session established)." + Style.RESET_ALL)
-    except Exception:
-        print(Fore.YELLOW + "Could not fully verify login; instaloader may still work for downloads." + Style.RESET_ALL)
+    pwd = getpass.getpass("Enter password (input hidden, blank to reuse saved session): ")
+    STATE['instaloader_login'] = {"user": user, "pass": pwd or None}
+    # Logs in (or reuses the saved session) once; every later flow shares this session
+    with heartbeat("Establishing secure channel"):
+        create_instaloader_session(user, pwd or None)
+    if SESSION["verified"]:
+        print(Fore.GREEN + "Login successful; session saved for later runs." + Style.RESET_ALL)
+    else:
+        print(Fore.YELLOW + "Could not verify login; continuing without an authenticated session." + Style.RESET_ALL)
 
 def set_hibp_key():
     key = input("Enter HIBP API key (leave blank to clear): ").strip()
@@ -518,6 +2945,11 @@ def show_last_summary():
 
 
 def run_cli():
+    # Pick up where the last run left off without touching the network
+    STATE['last_profile_data'] = cache_latest()
+    saved_user = restore_saved_session()
+    if saved_user:
+        STATE['instaloader_login'] = {"user": saved_user, "pass": None}
     while True:
         main_menu()
         try:
@@ -546,5 +2978,137 @@ def run_cli():
             print("Invalid option❌")
         input(Fore.CYAN + "\nPress Enter to continue..." + Style.RESET_ALL)
 
+# ---------- Headless commands ----------
+# Non-interactive entry points: no menu, no screen clearing, no animations, one JSON object on stdout
+EXIT_OK, EXIT_FAILED, EXIT_USAGE = 0, 1, 2
+
+def headless_login(args):
+    user = args.login or restore_saved_session()
+    return user, os.environ.get("INSTALOADER_PASSWORD") if args.login else None
+
+def headless_profile(args, username):
+    """
+    Profile data from the cache (unless --refresh / --rewalk or older than --ttl), else from the
+    network. Returns (ok, data_or_error, profile_obj, from_cache).
+    """
+    if not (args.refresh or args.rewalk):
+        cached = cache_load(username, ttl=args.ttl)
+        if cached:
+            return True, cached["data"], None, True
+    L = create_instaloader_session(*headless_login(args))
+    return fetch_profile_cached(L, username, force_refresh=True, full=args.rewalk)
+
+def cmd_analyze(args, username):
+    ok, result, _, from_cache = headless_profile(args, username)
+    if not ok:
+        return False, {"error": result}
+    return True, {"from_cache": from_cache, "profile": result}
+
+def cmd_download(args, username):
+    ok, result, profile_obj, _ = headless_profile(args, username)
+    if not ok:
+        return False, {"error": result}
+    ok, res, failed = download_media(profile_obj, username, *headless_login(args), ttl=args.ttl)
+    if not ok:
+        return False, {"error": res}
+    # Partial downloads exit non-zero, with the posts that still need a retry
+    return not failed, {"folder": res, "files": len(media_files(res)), "failed": failed}
+
+def cmd_report(args, username):
+    ok, result, _, _ = headless_profile(args, username)
+    if not ok:
+        return False, {"error": result}
+    data = dict(result)
+    data['BreachStatus'] = start_breach_check(username, args.hibp_key)
+    ok, path = generate_pdf_report(data, username, gallery=args.gallery)
+    if not ok:
+        return False, {"error": path}
+    return True, {"pdf": path,
+                  "txt": os.path.join(REPORTS_DIR, f"{username}_report.txt"),
+                  "json": os.path.join(REPORTS_DIR, f"{username}_report.json")}
+
+def cmd_zip(args, username):
+    folder = os.path.join(DOWNLOADS_DIR, username)
+    if not os.path.isdir(folder):
+        return False, {"error": f"No downloads found at: {folder}"}
+    leave_out = collapsed_duplicates(folder) if args.collapse else {}
+    ok, res = zip_folder(folder, os.path.join(DOWNLOADS_DIR, f"{username}_media"), leave_out=leave_out)
+    if not ok:
+        return False, {"error": res}
+    return True, {"archive": res, "bytes": os.path.getsize(res), "left_out": len(leave_out)}
+
+HEADLESS_COMMANDS = {
+    "analyze": (cmd_analyze, "fetch profile metadata (served from the cache while it is fresh)"),
+    "download": (cmd_download, "download posts, reels and the profile picture"),
+    "report": (cmd_report, "write the PDF/TXT/JSON reports"),
+    "zip": (cmd_zip, "package downloaded media into a ZIP archive"),
+}
+
+def build_parser():
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog="ig_osint.py",
+        description="Run without arguments for the interactive menu, or use a subcommand for JSON output.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, (_, help_text) in HEADLESS_COMMANDS.items():
+        cmd = sub.add_parser(name, help=help_text)
+        cmd.add_argument("target", help="Instagram profile URL or username")
+        cmd.add_argument("--login", default=os.environ.get("INSTALOADER_LOGIN"),
+                         help="Instaloader login (password from INSTALOADER_PASSWORD; default: saved session)")
+        cmd.add_argument("--refresh", action="store_true", help="ignore the profile cache")
+        cmd.add_argument("--rewalk", action="store_true",
+                         help="ignore the profile cache and page through the whole feed again")
+        cmd.add_argument("--ttl", type=int, default=CACHE_TTL, help="max cache age in seconds (default %(default)s)")
+        cmd.add_argument("--hibp-key", default=os.environ.get("HIBP_API_KEY"), help="HIBP API key (report only)")
+        cmd.add_argument("--gallery", action="store_true",
+                         help="add contact sheets of the downloaded images to the PDF (report only)")
+        cmd.add_argument("--collapse", action="store_true",
+                         help="leave near-duplicate images out, keeping the largest of each group (zip only)")
+    return parser
+
+def run_headless(argv):
+    args = build_parser().parse_args(argv)
+    ANIMATIONS["enabled"] = False
+    username = extract_username(args.target)
+    out = {"command": args.command, "target": args.target, "username": username}
+    if not username:
+        out.update(ok=False, error="Invalid profile URL or username")
+        code = EXIT_USAGE
+    else:
+        handler = HEADLESS_COMMANDS[args.command][0]
+        start = time.perf_counter()
+        try:
+            ok, result = handler(args, username)
+        except Exception as e:
+            ok, result = False, {"error": str(e)}
+        out.update(result, ok=ok, seconds=round(time.perf_counter() - start, 3))
+        code = EXIT_OK if ok else EXIT_FAILED
+    print(json.dumps(out, ensure_ascii=False, default=str))
+    return code
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if TRACE_FILE and not TRACE["enabled"]:
+        enable_tracing()
+    import contextlib
+    try:
+        with contextlib.ExitStack() as stack:
+            if REPLAY_FILE or RECORD_FILE:
+                try:
+                    cassette = Cassette(REPLAY_FILE or RECORD_FILE, replay=bool(REPLAY_FILE))
+                except Exception as e:
+                    print(f"Cannot open cassette: {e}", file=sys.stderr)
+                    return EXIT_USAGE
+                stack.callback(cassette.close)
+                stack.enter_context(Transport(cassette))
+            if argv:
+                return run_headless(argv)
+            run_cli()
+            return EXIT_OK
+    finally:
+        if TRACE_FILE:
+            summary = export_trace(TRACE_FILE)
+            print(f"Trace written: {TRACE_FILE} (summary: {summary})", file=sys.stderr)
+
 if __name__ == "__main__":
-    run_cli()
+    sys.exit(main())
@@ -0,0 +1,407 @@
+"""
+Unit tests for ig_osint. Run with `python -m pytest`. Media and the CDN come from the
+benchmark stand-in, so nothing touches the network.
+"""
+
+import os
+import sys
+import json
+import struct
+import zipfile
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+import ig_osint
+from fake_instagram import FakeInstagram, SyntheticProfile, fake_jpeg, fake_mp4, fake_repost
+
+# 2025-01-01T00:00:00Z in MP4 time (seconds since 1904)
+MP4_CREATED = ig_osint.MP4_EPOCH_OFFSET + 1735689600
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # Every output path of ig_osint is relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+# ---------- MP4 box parser ----------
+def box(kind, payload):
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+def box64(kind, payload):
+    """A box with a 64-bit size (size field 1, real size after the type)."""
+    return struct.pack(">I4sQ", 1, kind, 16 + len(payload)) + payload
+
+def video_trak():
+    tkhd = box(b"tkhd", struct.pack(">B3x5I8x4H36xII", 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 720 << 16, 1280 << 16))
+    hdlr = box(b"hdlr", struct.pack(">4x4x4s12x", b"vide") + b"\x00")
+    stsd = box(b"stsd", struct.pack(">4xI", 1) + box(b"avc1", b"\x00" * 8))
+    return box(b"trak", tkhd + box(b"mdia", hdlr + box(b"minf", box(b"stbl", stsd))))
+
+def mvhd_v0(timescale, duration):
+    return box(b"mvhd", struct.pack(">B3xIIII", 0, MP4_CREATED, MP4_CREATED, timescale, duration) + b"\x00" * 80)
+
+def mvhd_v1(timescale, duration):
+    return box(b"mvhd", struct.pack(">B3xQQIQ", 1, MP4_CREATED, MP4_CREATED, timescale, duration) + b"\x00" * 80)
+
+def write_mp4(path, moov, ftyp=True, mdat=b"\x00" * 64):
+    data = (box(b"ftyp", b"isom\x00\x00\x02\x00isom") if ftyp else b"") + box(b"mdat", mdat) + moov
+    path.write_bytes(data)
+    return str(path)
+
+def test_mp4_mvhd_version_0(workdir):
+    info = ig_osint.mp4_info(write_mp4(workdir / "v0.mp4", box(b"moov", mvhd_v0(1000, 12500) + video_trak())))
+    assert info["duration_s"] == 12.5
+    assert info["created_utc"] == "2025-01-01T00:00:00Z"
+    assert (info["video_codec"], info["width"], info["height"]) == ("avc1", 720, 1280)
+
+def test_mp4_mvhd_version_1(workdir):
+    info = ig_osint.mp4_info(write_mp4(workdir / "v1.mp4", box(b"moov", mvhd_v1(600, 600 * 90) + video_trak())))
+    assert info["duration_s"] == 90.0
+    assert info["created_utc"] == "2025-01-01T00:00:00Z"
+
+def test_mp4_short_version_1_mvhd_keeps_the_rest(workdir):
+    # 20 bytes are enough for a v0 header but not for v1; the tracks must still be read
+    short = box(b"mvhd", struct.pack(">B3xIIII", 1, MP4_CREATED, MP4_CREATED, 1000, 5000))
+    info = ig_osint.mp4_info(write_mp4(workdir / "short.mp4", box(b"moov", short + video_trak())))
+    assert info["duration_s"] is None and info["created_utc"] is None
+    assert info["video_codec"] == "avc1"
+
+def test_mp4_64_bit_box_sizes(workdir):
+    moov = box64(b"moov", mvhd_v0(1000, 3000) + video_trak())
+    path = workdir / "large.mp4"
+    path.write_bytes(box64(b"mdat", b"\x00" * 64) + moov)
+    info = ig_osint.mp4_info(str(path))
+    assert info["duration_s"] == 3.0 and info["width"] == 720
+
+def test_mp4_truncated_file(workdir):
+    data = fake_mp4("truncated.mp4", 4096)
+    path = workdir / "truncated.mp4"
+    moov = data.index(b"moov") - 4
+    # cut through the moov box, wherever the encoder put it
+    path.write_bytes(data[:moov + 40])
+    assert ig_osint.mp4_info(str(path)) is None
+    path.write_bytes(b"")
+    assert ig_osint.mp4_info(str(path)) is None
+
+# ---------- Post spool ----------
+@pytest.fixture
+def instagram():
+    profile = SyntheticProfile("spool", posts=60)
+    fake = FakeInstagram([profile])
+    ig_osint.SESSION.update(loader=None, user=None, verified=False)
+    with ig_osint.Transport(fake):
+        L = ig_osint.create_instaloader_session()
+        # no politeness delays against the stand-in
+        L.context.sleep = False
+        L.context._rate_controller.sleep = lambda secs: None
+        yield profile, fake
+    ig_osint.SESSION.update(loader=None, user=None, verified=False)
+
+def test_expired_cache_reanalyze_pages_nothing_new(instagram, capsys):
+    profile, fake = instagram
+    assert ig_osint.main(["analyze", "spool"]) == 0
+    assert fake.requests["graphql"] == 4
+    for flags in (["--ttl", "0"], ["--refresh"]):
+        fake.reset_counters()
+        assert ig_osint.main(["analyze", "spool", *flags]) == 0
+        # the first page comes with the profile and already holds the newest spooled post
+        assert "graphql" not in fake.requests
+    assert ig_osint.spool_summary("spool")["posts"] == 60
+
+def test_reanalyze_drops_deleted_posts(instagram, capsys):
+    profile, fake = instagram
+    assert ig_osint.main(["analyze", "spool"]) == 0
+    profile.deleted.add(40)
+    assert ig_osint.main(["analyze", "spool", "--ttl", "0"]) == 0
+    # more posts spooled than the profile reports: the walk falls back to the whole feed
+    assert ig_osint.spool_summary("spool")["posts"] == 59
+    fake.reset_counters()
+    assert ig_osint.main(["analyze", "spool", "--rewalk"]) == 0
+    assert fake.requests["graphql"] == 4
+    assert "spoo0000040" not in {r["shortcode"] for r in ig_osint.iter_spooled_posts("spool")}
+
+# ---------- Download manifest ----------
+@pytest.fixture
+def cdn():
+    profile = SyntheticProfile("resume", posts=3, video_every=0, sidecar_every=0)
+    fake = FakeInstagram([profile])
+    session = requests.Session()
+    session.mount("https://", fake)
+    yield profile, fake, session
+    session.close()
+
+def download(session, folder, jobs):
+    manifest = ig_osint.DownloadManifest(folder)
+    try:
+        return ig_osint.download_files(session, jobs, folder, manifest)
+    finally:
+        manifest.close()
+
+def test_manifest_resume_fetches_only_the_failed_post(workdir, cdn):
+    profile, fake, session = cdn
+    folder = str(workdir / "dl")
+    os.makedirs(folder)
+    # the second post's URL has expired by the time it is fetched, and there is no refresh
+    expired = ("resu0000001", [(profile.media_url("resu0000001.jpg"), "b.jpg")], None, None)
+    profile.url_epoch += 1
+    good = ("resu0000000", [(profile.media_url("resu0000000.jpg"), "a.jpg")], None, None)
+    failed = download(session, folder, [good, expired])
+    assert list(failed) == ["resu0000001"] and "403" in failed["resu0000001"]
+
+    manifest = ig_osint.DownloadManifest(folder)
+    manifest.close()
+    assert manifest.is_complete("resu0000000") and not manifest.is_complete("resu0000001")
+
+    fake.reset_counters()
+    fresh = ("resu0000001", [(profile.media_url("resu0000001.jpg"), "b.jpg")], None, None)
+    assert download(session, folder, [good, fresh]) == {}
+    assert fake.requests == {"cdn": 1}
+    manifest = ig_osint.DownloadManifest(folder)
+    manifest.close()
+    assert manifest.is_complete("resu0000001")
+
+def test_manifest_refreshes_expired_urls(workdir, cdn):
+    profile, fake, session = cdn
+    folder = str(workdir / "dl")
+    os.makedirs(folder)
+    stale = profile.media_url("resu0000002.jpg")
+    profile.url_epoch += 1
+    refresh = lambda: [(profile.media_url("resu0000002.jpg"), "c.jpg")]
+    assert download(session, folder, [("resu0000002", [(stale, "c.jpg")], None, refresh)]) == {}
+    assert fake.requests == {"cdn": 2}
+
+def test_manifest_ignores_a_torn_last_line(workdir):
+    folder = str(workdir)
+    (workdir / "a.jpg").write_bytes(b"x" * 10)
+    manifest = ig_osint.DownloadManifest(folder)
+    manifest.begin("one", ["a.jpg"])
+    manifest.finish("one", {"a.jpg": 10})
+    manifest.begin("two", ["b.jpg"])
+    manifest.close()
+    with open(manifest.path, "a", encoding="utf-8") as f:
+        f.write('{"shortcode": "two", "comp')
+    reopened = ig_osint.DownloadManifest(folder)
+    reopened.close()
+    assert reopened.is_complete("one") and not reopened.is_complete("two")
+    assert reopened.recorded_size("one", "a.jpg") == 10
+    # a file that changed on disk no longer counts as downloaded
+    (workdir / "a.jpg").write_bytes(b"x" * 11)
+    assert not reopened.is_complete("one")
+
+# ---------- ZIP append vs rebuild ----------
+@pytest.fixture
+def evidence(workdir):
+    folder = workdir / "evidence"
+    folder.mkdir()
+    (folder / "notes.txt").write_text("first\n")
+    (folder / "pic.jpg").write_bytes(fake_jpeg("pic.jpg", 64))
+    (folder / ig_osint.MANIFEST_NAME).write_text("{}\n")
+    return folder
+
+def zip_names(archive):
+    with zipfile.ZipFile(archive) as zf:
+        assert zf.testzip() is None
+        return zf.namelist()
+
+def test_zip_appends_new_files(workdir, evidence):
+    ok, archive = ig_osint.zip_folder(str(evidence), str(workdir / "case"))
+    assert ok and sorted(zip_names(archive)) == ["SHA256SUMS", "notes.txt", "pic.jpg"]
+    with open(archive, "rb") as f:
+        before = f.read()
+    (evidence / "more.txt").write_text("second\n")
+    assert ig_osint.zip_folder(str(evidence), str(workdir / "case")) == (True, archive)
+    assert zip_names(archive)[3:] == ["more.txt", "SHA256SUMS.2"]
+    with zipfile.ZipFile(archive) as zf:
+        assert zf.read("SHA256SUMS.2").decode().endswith("  more.txt\n")
+        first = zf.getinfo("SHA256SUMS")
+    with open(archive, "rb") as f:
+        # the members already written are left where they were
+        assert f.read(first.header_offset) == before[:first.header_offset]
+
+def test_zip_rebuilds_when_a_member_changed(workdir, evidence):
+    ig_osint.zip_folder(str(evidence), str(workdir / "case"))
+    (evidence / "notes.txt").write_text("first, edited\n")
+    ok, archive = ig_osint.zip_folder(str(evidence), str(workdir / "case"))
+    assert ok and sorted(zip_names(archive)) == ["SHA256SUMS", "notes.txt", "pic.jpg"]
+    with zipfile.ZipFile(archive) as zf:
+        assert zf.read("notes.txt") == b"first, edited\n"
+
+def test_zip_ignores_dotfiles(workdir, evidence):
+    ok, archive = ig_osint.zip_folder(str(evidence), str(workdir / "case"))
+    mtime = os.path.getmtime(archive)
+    (evidence / ig_osint.MANIFEST_NAME).write_text('{"synced_through": "x"}\n')
+    assert ig_osint.zip_folder(str(evidence), str(workdir / "case")) == (True, archive)
+    assert os.path.getmtime(archive) == mtime
+
+def test_zip_interrupted_append_keeps_the_archive(workdir, evidence, monkeypatch):
+    ok, archive = ig_osint.zip_folder(str(evidence), str(workdir / "case"))
+    with open(archive, "rb") as f:
+        before = f.read()
+    (evidence / "more.txt").write_text("second\n")
+
+    def interrupted(self):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(ig_osint._ZipWriter, "close", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        ig_osint.zip_folder(str(evidence), str(workdir / "case"))
+    with open(archive, "rb") as f:
+        assert f.read() == before
+
+def test_zip64_fields(workdir, evidence, monkeypatch):
+    # Every size and offset past a tiny limit, so the ZIP64 records are written and read back
+    monkeypatch.setattr(ig_osint, "ZIP64_LIMIT", 16)
+    (evidence / "large.txt").write_text("line\n" * 5000)
+    ok, archive = ig_osint.zip_folder(str(evidence), str(workdir / "case"))
+    (evidence / "more.txt").write_text("second\n")
+    assert ig_osint.zip_folder(str(evidence), str(workdir / "case")) == (True, archive)
+    with zipfile.ZipFile(archive) as zf:
+        assert zf.testzip() is None
+        assert zf.read("large.txt") == b"line\n" * 5000
+        assert zf.getinfo("large.txt").compress_type == zipfile.ZIP_DEFLATED
+        assert zf.namelist()[-2:] == ["more.txt", "SHA256SUMS.2"]
+
+# ---------- Near-duplicate grouping ----------
+def test_dhash_groups_a_reposted_picture(workdir):
+    folder = workdir / "media"
+    folder.mkdir()
+    (folder / "original.jpg").write_bytes(fake_jpeg("seed0000000.jpg", 320))
+    (folder / "repost.jpg").write_bytes(fake_repost("seed0000000.jpg", 320))
+    (folder / "copy.jpg").write_bytes(fake_jpeg("seed0000000.jpg", 320))
+    (folder / "other.jpg").write_bytes(fake_jpeg("seed0000007.jpg", 320))
+    hashes = ig_osint.hash_folder(str(folder))
+    groups = ig_osint.near_duplicate_groups(str(folder), hashes)
+    assert len(groups) == 1
+    assert sorted(groups[0]) == ["copy.jpg", "original.jpg", "repost.jpg"]
+    # the largest file (the original, not the lower-quality repost) is kept
+    assert groups[0][0] in ("copy.jpg", "original.jpg")
+    # distances are cached by content, so a second pass hashes nothing new
+    assert os.path.exists(ig_osint.DHASH_INDEX)
+    assert ig_osint.near_duplicate_groups(str(folder), hashes) == groups
+
+def test_dhash_distance_threshold(workdir):
+    folder = workdir / "media"
+    folder.mkdir()
+    (folder / "original.jpg").write_bytes(fake_jpeg("seed0000000.jpg", 320))
+    (folder / "repost.jpg").write_bytes(fake_repost("seed0000000.jpg", 320))
+    hashes = ig_osint.hash_folder(str(folder))
+    distance = bin(ig_osint.dhash_image(str(folder / "original.jpg")) ^
+                   ig_osint.dhash_image(str(folder / "repost.jpg"))).count("1")
+    assert ig_osint.near_duplicate_groups(str(folder), hashes, max_distance=distance)
+    if distance:
+        assert ig_osint.near_duplicate_groups(str(folder), hashes, max_distance=distance - 1) == []
+
+def test_collapse_leaves_out_only_files_close_to_a_kept_one(workdir, monkeypatch):
+    folder = workdir / "media"
+    folder.mkdir()
+    # a ~ b and b ~ c are 8 bits apart, but a and c are 16: one transitive group
+    fake_hashes = {"a.jpg": 0, "b.jpg": (1 << 8) - 1, "c.jpg": (1 << 16) - 1}
+    for size, name in enumerate(("c.jpg", "b.jpg", "a.jpg"), start=1):
+        (folder / name).write_bytes(name.encode() * size)
+    monkeypatch.setattr(ig_osint, "dhash_image", lambda path: fake_hashes[os.path.basename(path)])
+    groups = ig_osint.near_duplicate_groups(str(folder), ig_osint.hash_folder(str(folder)))
+    assert groups == [["a.jpg", "b.jpg", "c.jpg"]]
+    # c is not within 10 bits of the kept a, so it stays in the archive
+    assert ig_osint.collapsed_duplicates(str(folder)) == {"b.jpg": "a.jpg"}
+
+# ---------- Tracing ----------
+@pytest.fixture
+def tracing():
+    ig_osint.enable_tracing()
+    yield ig_osint.TRACE
+    ig_osint.TRACE["enabled"] = False
+
+def test_spans_count_only_their_own_thread(instagram, tracing, monkeypatch, capsys):
+    profile, fake = instagram
+    monkeypatch.setattr(ig_osint, "DOWNLOAD_WORKERS", 4)
+    assert ig_osint.main(["download", "spool"]) == 0
+    summary = ig_osint.trace_summary()
+    files = summary["counters"]["files.downloaded"]
+    assert files == fake.requests["cdn"]
+    # fetched on the download pool: all of it in fetch_file, none in the phases that waited for it
+    assert summary["phases"]["fetch_file"]["calls"] == files
+    assert summary["phases"]["fetch_file"]["files.downloaded"] == files
+    assert "files.downloaded" not in summary["phases"]["download_files"]
+    assert "files.downloaded" not in summary["phases"]["download_media"]
+
+def test_retry_sleeps_are_counted(workdir, tracing, monkeypatch):
+    slept = []
+    monkeypatch.setattr(ig_osint.time, "sleep", slept.append)
+    session = requests.Session()
+    failures = iter([requests.exceptions.ConnectionError("reset"), None])
+
+    class Flaky(requests.adapters.HTTPAdapter):
+        def send(self, request, **kwargs):
+            error = next(failures)
+            if error:
+                raise error
+            return FakeInstagram([]).send(request, **kwargs)
+    session.mount("https://", Flaky())
+    with pytest.raises(requests.exceptions.HTTPError):
+        ig_osint.fetch_file(session, "https://example.invalid/x.jpg", str(workdir / "x.jpg"))
+    assert slept == [2]
+    assert ig_osint.trace_summary()["phases"]["fetch_file"]["sleep.retry_s"] == 2
+
+# ---------- Font metrics cache ----------
+def font_pdf():
+    import datetime
+    import fpdf
+    pdf = fpdf.FPDF()
+    pdf.set_creation_date(datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc))
+    ig_osint.add_cached_font(pdf, "DVMono", ig_osint.find_report_font())
+    pdf.add_page()
+    pdf.set_font("DVMono", size=10)
+    pdf.multi_cell(0, 5, "wörld ✓ ±§ 12345")
+    return bytes(pdf.output())
+
+def test_font_cache_output_is_identical(monkeypatch):
+    monkeypatch.setattr(ig_osint, "_FONT_METRICS", {})
+    parsed = font_pdf()
+    ig_osint._FONT_METRICS.clear()
+    assert font_pdf() == parsed
+
+def test_font_cache_missing_field_falls_back(monkeypatch):
+    monkeypatch.setattr(ig_osint, "_FONT_METRICS", {})
+    parsed = font_pdf()
+    path = ig_osint.find_report_font()
+    cache_path = ig_osint._font_metrics_path(path, ig_osint._font_stamp(path))
+    with open(cache_path, encoding="utf-8") as f:
+        metrics = json.load(f)
+    del metrics["glyph_ids"]
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump(metrics, f)
+    ig_osint._FONT_METRICS.clear()
+    assert font_pdf() == parsed
+    with open(cache_path, encoding="utf-8") as f:
+        assert "glyph_ids" in json.load(f)
+
+# ---------- Cassettes ----------
+def login_request(password, user="someone"):
+    enc_password = f"#PWD_INSTAGRAM_BROWSER:0:1735689600:{password}"
+    return requests.Request("POST", "https://www.instagram.com/api/v1/web/accounts/login/ajax/",
+                            data={"enc_password": enc_password, "username": user}).prepare()
+
+def test_cassette_keys_do_not_depend_on_the_password():
+    key = ig_osint.Cassette.request_key
+    assert key(login_request("hunter2")) == key(login_request("correct horse"))
+    assert key(login_request("hunter2")) != key(login_request("hunter2", user="someone else"))
+
+def test_cassette_keeps_no_login_secrets(workdir):
+    tape = str(workdir / "tape.sqlite3")
+    cassette = ig_osint.Cassette(tape)
+    fake = FakeInstagram([])
+    with ig_osint.Transport(fake), ig_osint.Transport(cassette):
+        session = requests.Session()
+        session.get("https://www.instagram.com/")
+        session.send(login_request("hunter2"))
+    cassette.close()
+    with open(tape, "rb") as f:
+        stored = f.read()
+    assert b"hunter2" not in stored and b"fakecsrf" not in stored
+    # replaying answers the login whatever password it is sent with
+    replay = ig_osint.Cassette(tape, replay=True)
+    with ig_osint.Transport(replay):
+        assert requests.Session().send(login_request("something else")).status_code == 404
+    replay.close()